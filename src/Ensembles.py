@@ -0,0 +1,150 @@
+# TODO:
+
+from array import array
+from itertools import product
+from Vectors import Vector, VectorBatch, numpy
+
+g = 9.8
+
+def exceeding(values, limit, flags):
+    '''
+    Returns the indexes where values is over limit and flags is non-zero.
+    '''
+    if numpy is not None:
+        return numpy.nonzero((numpy.asarray(values) > limit) & (numpy.asarray(flags) != 0))[0]
+    return [index for index, (value, flag) in enumerate(zip(values, flags)) if flag and value > limit]
+
+class CoinEnsemble(object):
+    '''
+    Simulates lots of independent coins on roundabouts at once, one for each set of mu, omega and radius values.
+    Every coin follows exactly the same steps as the coin in CoinOnRoundaboutModel, but the whole ensemble moves on in a
+    single VectorBatch calculation per tick, so eg a grid of thousands of coins for a heat map takes seconds rather than hours.
+    The mass doesn't matter, as it cancels out of every equation.
+    '''
+
+    def __init__(self, mus, omegas, radiuses, centre = Vector(1.4, 1.0), startPosition = Vector(0, 0), exitDistance = 1.2):
+        '''
+        Sets up one coin for each position in the lists of mu, omega and radius values (which should be the same length).
+        The coins start radius away from the centre towards startPosition, as in the simulation, and leave the screen
+        once they are exitDistance from the centre.
+        '''
+        self.mus = list(mus)
+        self.omegas = list(omegas)
+        self.radiuses = list(radiuses)
+        self.centre = centre
+        self.startPosition = startPosition
+        self.exitDistance = exitDistance
+        self.reset()
+
+    def fromGrid(cls, muValues, omegaValues, radiusValues, **options):
+        # Makes a coin for every combination of the values, with the radius changing fastest
+        grid = list(product(muValues, omegaValues, radiusValues))
+        return cls([mu for mu, omega, radius in grid], [omega for mu, omega, radius in grid], [radius for mu, omega, radius in grid], **options)
+
+    fromGrid = classmethod(fromGrid)
+
+    def __len__(self):
+        return len(self.mus)
+
+    def reset(self):
+        '''
+        Puts every coin back at the start, on its roundabout.
+        '''
+        count = len(self)
+        self.time = 0.0
+
+        # Friction can only provide the centripetal force while g mu > omega^2 r, and none of these change during a run.
+        # So every coin that is going to slip does so in the first tick.
+        self.safe = [g * mu > omega ** 2 * radius for mu, omega, radius in zip(self.mus, self.omegas, self.radiuses)]
+        self.slipping = [index for index in range(count) if not self.safe[index]]
+        self.radiusArray = array('d', self.radiuses)
+        self.speeds = array('d', [omega * radius for omega, radius in zip(self.omegas, self.radiuses)])
+
+        # Multiplying by these picks out the coins on and off their roundabouts, without a Python loop each tick.
+        self.onRoundabout = array('d', [1.0] * count)
+        self.offRoundabout = array('d', [0.0] * count)
+        self.centripetal = array('d', [omega ** 2 * radius for omega, radius in zip(self.omegas, self.radiuses)])
+        self.onScreen = array('d', [1.0] * count)
+
+        self.positions = VectorBatch([self.startPosition.x] * count, [self.startPosition.y] * count)
+        self.velocities = VectorBatch([0.0] * count, [0.0] * count)
+        self.followRoundabouts()
+
+        self.slipTimes = [None] * count
+        self.finalPositions = [None] * count # Where each coin was at the end of the tick it left the screen
+        self.exitTimes = [None] * count
+        self.exitPositions = [None] * count
+        self.exitVelocities = [None] * count
+
+    def followRoundabouts(self):
+        '''
+        Does what Coin.updateFromInput does for every coin: coins still on their roundabout are put back at their radius and
+        moved round the circle at omega r, and the rest keep their direction at a speed of omega r.
+        '''
+        offsets = self.positions - self.centre
+        self.positions = (offsets.scaleAbs(self.radiusArray) + self.centre) * self.onRoundabout + self.positions * self.offRoundabout
+        self.velocities = (offsets.perpendicular() * self.onRoundabout + self.velocities * self.offRoundabout).scaleAbs(self.speeds)
+
+    def step(self, deltaTime):
+        '''
+        Moves every coin on by one tick of deltaTime seconds, recording when they slip and leave the screen.
+        Coins carry on moving after they have left, but what happened as they left is kept.
+        Returns the number of coins still on the screen.
+        '''
+        startTime = self.time
+        self.time += deltaTime
+
+        # Coins slip at the start of the first tick their roundabout can't hold them.
+        for index in self.slipping:
+            self.onRoundabout[index] = 0.0
+            self.offRoundabout[index] = 1.0
+            self.centripetal[index] = 0.0
+            self.slipTimes[index] = startTime
+        self.slipping = []
+
+        # The centripetal force while on the roundabout, and nothing once they've slipped, then a symplectic Euler step.
+        startPositions = self.positions.copy()
+        self.velocities.addScaled((self.positions - self.centre).scaleAbs(self.centripetal), -deltaTime)
+        self.positions.addScaled(self.velocities, deltaTime)
+        self.followRoundabouts()
+
+        # Find exactly when the coins that have just gone over the edge crossed it, along the straight line they moved in.
+        for index in exceeding(abs(self.positions - self.centre), self.exitDistance, self.onScreen):
+            start = startPositions[index] - self.centre
+            moved = self.positions[index] - startPositions[index]
+            # Solve |start + moved s| = exitDistance for s between 0 and 1.
+            a = moved.x ** 2 + moved.y ** 2
+            b = 2 * (start.x * moved.x + start.y * moved.y)
+            c = start.x ** 2 + start.y ** 2 - self.exitDistance ** 2
+            fraction = max(0.0, (-b + sqrt(max(b ** 2 - 4 * a * c, 0.0))) / (2 * a))
+            self.exitTimes[index] = startTime + fraction * deltaTime
+            self.exitPositions[index] = startPositions[index] + moved * fraction
+            self.exitVelocities[index] = self.velocities[index]
+            self.finalPositions[index] = self.positions[index]
+            self.onScreen[index] = 0.0
+
+        return int(sum(self.onScreen))
+
+    def run(self, duration, deltaTime = 0.01):
+        '''
+        Steps every coin for duration seconds in ticks of deltaTime, stopping early once they have all left the screen.
+        Returns the number of ticks taken.
+        '''
+        steps = 0
+        for tick in range(int(round(duration / deltaTime))):
+            steps += 1
+            if self.step(deltaTime) == 0:
+                break
+        return steps
+
+    def results(self):
+        '''
+        Returns a dictionary for each coin, in the same order they were given, with its parameters and what happened to it.
+        Times, exit positions and exit velocities are None if it never happened. The final position is where the coin was
+        when it left the screen (at the end of that tick, like the simulation stopping), or at the end of the run if it didn't.
+        '''
+        finalPositions = [current if final is None else final for final, current in zip(self.finalPositions, self.positions.toVectors())]
+        return [{"mu": self.mus[index], "omega": self.omegas[index], "radius": self.radiuses[index], "safe": self.safe[index],
+                 "slipTime": self.slipTimes[index], "exitTime": self.exitTimes[index], "exitPosition": self.exitPositions[index],
+                 "exitVelocity": self.exitVelocities[index], "finalPosition": finalPositions[index]}
+                for index in range(len(self))]
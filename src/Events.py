@@ -0,0 +1,85 @@
+# TODO:
+
+class Event(object):
+    '''
+    Records something that happened in a simulation (eg the string going slack), when it happened and anything else worth knowing about it.
+    '''
+
+    def __init__(self, name, time, value = None):
+        self.name = name
+        self.time = time
+        self.value = value
+
+    def __str__(self):
+        return self.name + " at " + str(round(self.time, 4)) + "s"
+
+def findRoot(function, low, high, functionLow = None, functionHigh = None, tolerance = 1e-10, maxIterations = 100):
+    '''
+    Finds where function crosses zero between low and high using Brent's method, which mixes bisection (always safe) with
+    interpolation (fast once it is close). The function must have opposite signs at low and high.
+    Its values there can be passed in if they are already known.
+    '''
+    a, b = low, high
+    fa = function(a) if functionLow is None else functionLow
+    fb = function(b) if functionHigh is None else functionHigh
+    if fa == 0:
+        return a
+    if fb == 0:
+        return b
+    if (fa > 0) == (fb > 0):
+        raise ValueError("The root is not between low and high.")
+
+    # c is the other end of the current bracket, and d and e are the last two step sizes.
+    c, fc = b, fb
+    d = e = b - a
+    for iteration in range(maxIterations):
+        if (fb > 0) == (fc > 0):
+            # b and c are on the same side, so the bracket is from a to b.
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            # Keep b as the best guess so far.
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        accuracy = 4e-16 * abs(b) + 0.5 * tolerance
+        halfBracket = 0.5 * (c - b)
+        if abs(halfBracket) <= accuracy or fb == 0:
+            return b
+
+        if abs(e) >= accuracy and abs(fa) > abs(fb):
+            # Try interpolating: a secant step if there are only two points, otherwise inverse quadratic interpolation.
+            s = fb / fa
+            if a == c:
+                p = 2 * halfBracket * s
+                q = 1 - s
+            else:
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * halfBracket * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+
+            if 2 * p < min(3 * halfBracket * q - abs(accuracy * q), abs(e * q)):
+                e = d
+                d = p / q
+            else:
+                # Interpolation isn't shrinking the bracket fast enough, so bisect.
+                d = halfBracket
+                e = d
+        else:
+            d = halfBracket
+            e = d
+
+        a, fa = b, fb
+        if abs(d) > accuracy:
+            b += d
+        elif halfBracket > 0:
+            b += accuracy
+        else:
+            b -= accuracy
+        fb = function(b)
+
+    return b
@@ -0,0 +1,190 @@
+# TODO:
+
+# Times the expression evaluator on the sort of things typed into the input boxes, and on much bigger expressions to check
+# the work still grows in proportion to their length. Run it from normal Python with python src/ExpressionsBenchmark.py
+# (add --quick for smaller sizes). It exits with 1 if any of expectedValues come out wrong, if reading or evaluating has
+# started growing faster than the length, or has started going deeper into the stack as expressions get longer, so it can be
+# used to check changes to the parser.
+
+import sys
+import math
+from timeit import default_timer
+import ExpressionsEvaluation
+from ExpressionsEvaluation import basicEvaluate, compileExpression, fullCompile, fullEvaluate
+
+classroomInputs = ["3.5", "2pi", "sqrt(9.8*0.5)", "2^10", "1/3", "e^6pi + e^7", "sin(pi/6)", "(1 + 2)(3 + 4)", "10x9.8",
+                   "2*pi*sqrt(0.5/9.8)", "-2^2", "[1 + {2 - 3}]", "cos 0", "45 radians(1)", "ln e + log 100"]
+
+# Inputs that have been read wrongly before, with what they should give.
+expectedValues = [(fullEvaluate, "e^6pi + e^7", math.exp(6 * math.pi) + math.exp(7)),
+                  (fullEvaluate, "e^-6pi", math.exp(-6 * math.pi)),
+                  (fullEvaluate, "2^3^2", 512.0),
+                  (fullEvaluate, "-2^2", -4.0),
+                  (fullEvaluate, "1.5e3", 1500.0),
+                  (fullEvaluate, "1e5", 100000.0),
+                  (fullEvaluate, "2e-1", 0.2),
+                  (fullEvaluate, "2e", 2 * math.e),
+                  (fullEvaluate, "inf", float("inf")),
+                  (basicEvaluate, "1e5", 100000.0),
+                  (basicEvaluate, "inf", float("inf"))]
+
+# Each one makes an expression of about size parts.
+scalingCases = [("deep nesting", lambda size: "(" * size + "1" + ")" * size),
+                ("long flat sum", lambda size: "+".join(["1.5"] * size)),
+                ("function heavy", lambda size: "+".join(["sin(" + str(index % 7) + ")*cos(pi/" + str(index % 5 + 1) + ")" for index in range(size // 4)])),
+                ("nested functions", lambda size: "sqrt(abs(" * (size // 2) + "2" + "))" * (size // 2)),
+                ("variables", lambda size: "+".join(["t^2*v" if index % 2 else "sin(t)" for index in range(size // 4)])),
+                ("nested variables", lambda size: "sqrt(abs(" * (size // 4) + "t" + "-v))" * (size // 4))]
+
+maximumGrowth = 2.5 # Most the time per character is allowed to grow by when the expression gets 4 times longer
+maximumExtraDepth = 2 # Most the stack is allowed to grow by when the expression gets 4 times longer
+manyCount = 1000 # How many sets of values each expression is evaluated for, so the time is well above the timer's noise
+
+def compileFresh(exp):
+    # Compiles without the cache, so the time is for reading the whole expression.
+    return compileExpression(ExpressionsEvaluation.prepareExpression(exp), ExpressionsEvaluation.openBrackets, ExpressionsEvaluation.closeBrackets,
+                             ExpressionsEvaluation.functions, ExpressionsEvaluation.symbols, ["t", "v"], ExpressionsEvaluation.fullRegistry)
+
+def bestTime(function, repeats = 3):
+    '''
+    Returns the shortest time taken out of repeats runs of function, as the shortest is the least affected by anything else running.
+    '''
+    best = None
+    for repeat in range(repeats):
+        start = default_timer()
+        function()
+        taken = default_timer() - start
+        if best is None or taken < best:
+            best = taken
+    return best
+
+def peakDepth(function):
+    '''
+    Runs function, and returns how many Python calls deep it went, counting from function itself.
+    '''
+    depth = [0, 0] # Current and highest
+
+    def profile(frame, event, argument):
+        if event == "call":
+            depth[0] += 1
+            depth[1] = max(depth[1], depth[0])
+        elif event == "return":
+            depth[0] -= 1
+
+    sys.setprofile(profile)
+    try:
+        function()
+    finally:
+        sys.setprofile(None)
+    return depth[1]
+
+def measure(exp):
+    '''
+    Returns the time to compile exp, the time to evaluate it once compiled for manyCount sets of values, and the deepest either goes.
+    The evaluating time is None if the expression doesn't depend on the variables, as it was all worked out when compiling.
+    '''
+    values = {"t": [0.5 + index / float(manyCount) for index in range(manyCount)], "v": 2.0}
+    compiled = compileFresh(exp)
+    compileTime = bestTime(lambda: compileFresh(exp))
+    depth = peakDepth(lambda: compileFresh(exp))
+    if compiled.isConstant():
+        return compileTime, None, depth
+    evaluateTime = bestTime(lambda: compiled.evaluateMany(values))
+    depth = max(depth, peakDepth(lambda: compiled.evaluateMany(values)))
+    return compileTime, evaluateTime, depth
+
+def checkValues():
+    '''
+    Evaluates everything in expectedValues, and returns a list of any that didn't give what they should.
+    '''
+    failures = []
+    for evaluate, exp, expected in expectedValues:
+        try:
+            value = evaluate(exp)
+        except ValueError as error:
+            failures.append(exp + " gave an error: " + str(error))
+            continue
+        if not (value == expected or abs(value - expected) <= 1e-9 * abs(expected)):
+            failures.append(exp + " gave " + str(value) + " rather than " + str(expected))
+    return failures
+
+def benchmarkClassroom(repeats):
+    '''
+    Times fullEvaluate on typical inputs, both the first time (read from scratch) and when typed again (found in the cache).
+    Returns the number of evaluations per second for each.
+    '''
+    ExpressionsEvaluation.compiledExpressions.clear()
+    start = default_timer()
+    for exp in classroomInputs:
+        fullEvaluate(exp)
+    firstRate = len(classroomInputs) / (default_timer() - start)
+
+    start = default_timer()
+    for repeat in range(repeats):
+        for exp in classroomInputs:
+            fullEvaluate(exp)
+    cachedRate = repeats * len(classroomInputs) / (default_timer() - start)
+    return firstRate, cachedRate
+
+def benchmarkScaling(name, makeExpression, size):
+    '''
+    Measures an expression of size parts and one 4 times bigger, and prints how they compare.
+    Returns a list of everything that failed.
+    '''
+    failures = []
+    small, large = makeExpression(size), makeExpression(4 * size)
+    try:
+        smallCompile, smallEvaluate, smallDepth = measure(small)
+        largeCompile, largeEvaluate, largeDepth = measure(large)
+    except RuntimeError:
+        print("%-18s hit the recursion limit" % name)
+        return [name + ": hit the recursion limit"]
+
+    # Time per character, so a linear parser gives about 1 and a quadratic one about 4.
+    compileGrowth = (largeCompile / len(large)) / (smallCompile / len(small))
+    print("%-18s %6d chars  %8.0f chars/s to compile  growth %4.2f  depth %d -> %d"
+          % (name, len(large), len(large) / largeCompile, compileGrowth, smallDepth, largeDepth))
+    if compileGrowth > maximumGrowth:
+        failures.append(name + ": compiling grew " + str(round(compileGrowth, 2)) + " times faster than the length")
+
+    if largeEvaluate is not None:
+        evaluateGrowth = (largeEvaluate / len(large)) / (smallEvaluate / len(small))
+        print("%-18s %6d chars  %8.1f ms to evaluate %d times  growth %4.2f"
+              % ("", len(large), 1e3 * largeEvaluate, manyCount, evaluateGrowth))
+        if evaluateGrowth > maximumGrowth:
+            failures.append(name + ": evaluating grew " + str(round(evaluateGrowth, 2)) + " times faster than the length")
+    if largeDepth > smallDepth + maximumExtraDepth:
+        failures.append(name + ": the stack went from " + str(smallDepth) + " to " + str(largeDepth) + " calls deep")
+    return failures
+
+def main(arguments):
+    quick = "--quick" in arguments
+    size = 500 if quick else 2000
+
+    firstRate, cachedRate = benchmarkClassroom(200 if quick else 2000)
+    print("Classroom inputs: %.0f per second the first time, %.0f per second from the cache" % (firstRate, cachedRate))
+    cache = ExpressionsEvaluation.compiledExpressions
+    print("Cache: %d hits, %d misses" % (cache.hits, cache.misses))
+    print("")
+
+    failures = checkValues()
+    for name, makeExpression in scalingCases:
+        failures += benchmarkScaling(name, makeExpression, size)
+
+    # Deeper than Python's recursion limit, which a recursive parser couldn't manage at all.
+    depth = 5 * sys.getrecursionlimit()
+    try:
+        fullCompile("(" * depth + "1" + ")" * depth).evaluate()
+    except RuntimeError:
+        failures.append("brackets " + str(depth) + " deep hit the recursion limit")
+
+    print("")
+    if failures:
+        for failure in failures:
+            print("FAILED " + failure)
+        return 1
+    print("All passed")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,13 +1,27 @@
 # TODO:
-#   Should mismatched brackets work?
-#   Catch bracketing errors earlier on
-#   Possible division of 0 / sqrt of negatives / bad use of logs etc would crash system, sending lots of error messages
-#   Symbols that haven't been defined
-#   fullEvaluate("e^6pi + e^7") doesn't work because of order of operations
-#   Sort out negativeness
+
+# Expressions are read in a single pass, with the shunting yard algorithm turning them into a program in reverse Polish notation.
+# The program is then run on a stack, so evaluating takes time in proportion to the length of the expression, and neither
+# reading nor running it is recursive, so however deeply the brackets are nested it can't run out of stack.
+# The order of operations, from first to last, is:
+#   functions with brackets, eg sin(x), which only apply to what is in their brackets
+#   implicit multiplication in a power, so e^6pi = e^(6pi)
+#   ^ powers, which go from right to left, so 2^3^2 = 2^9
+#   minus signs at the start of a term, so -2^2 = -4
+#   times and divide (*, x, /), including implicit multiplication, eg 2pi or 3(4 + 5)
+#   functions without brackets, eg sin pi/2, which apply to the whole term after them
+#   plus and minus
 
 import re
 import math
+import operator
+from array import array
+from collections import OrderedDict
+
+try:
+    import numpy # Used by evaluateMany when it is installed (it isn't in Processing)
+except ImportError:
+    numpy = None
 
 class Function(object):
     '''
@@ -19,7 +33,7 @@ class Function(object):
         Functions have two attributes:
             Symbol is a string representation of the function.
             ApplyFunction is a function that actually carries out the function
-        '''        
+        '''
         self.symbol = symbol
         self.applyFunction = applyFunction
 
@@ -33,282 +47,490 @@ class Symbol(object):
         Functions have two attributes:
             Symbol is a string representation of the symbol.
             Value is a float that approximately represents the value of the symbol.
-        '''        
+        '''
         self.symbol = symbol
         self.value = value
 
-def basicEvaluate(exp):
-    '''
-    Evaluates an expression with only the simple brackets and no extra symbols or functions, for testing.
-    '''
-    return evaluateExpression(exp, ["("], [")"], [], [])
+# Binary operators, with their precedence (higher is done first) and whether they go from right to left.
+binaryOperators = {"+": (operator.add, 1, False),
+                   "-": (operator.sub, 1, False),
+                   "*": (operator.mul, 3, False),
+                   "x": (operator.mul, 3, False), # x can be used for multiplying
+                   "/": (operator.truediv, 3, False),
+                   "^": (math.pow, 5, True)}
 
-def fullEvaluate(exp):
-    '''
-    Takes an expression as a string, and returns an equivalent float.
-    '''
-    
-    exp = prepareExpression(exp)
-
-    # Sets up necessary brackets, functions and symbols.
-    openBrackets = ["(", "[", "{"]
-    closeBrackets = [")", "]", "}"]
-    
-    sqrt = Function("sqrt", math.sqrt)
-    cos = Function("cos", math.cos)
-    sin = Function("sin", math.sin)
-    tan = Function("tan", math.tan)
-    functions = [sqrt, cos, sin, tan]
-
-    pi = Symbol("pi", math.pi)
-    e = Symbol("e", math.e)
-    symbols = [pi, e]
-    
-    return evaluateExpression(exp, openBrackets, closeBrackets, functions, symbols)
-
-def prepareExpression(exp):
-    '''
-    Prepares an expression for the evaluateExpression function by making the format easier and less ambiguous.
-    '''
+functionPrecedence = 2 # For functions without brackets
+negativePrecedence = 4
 
-    # Puts a multiply symbol between two characters
-    def addMultiply(s):
-        s = s.group()
-        return s[0] + "*" + s[1]
-    
-    # Remove spaces
-    exp = exp.replace(" ", "")
+implicitPowerPrecedence = 6 # For implicit multiplication in a power, so e^6pi = e^(6pi)
 
-    # Add some * symbols for implicit multiplication
-    exp = exp.replace(")(", ")*(")      
-    exp = re.sub(r"[0-9][a-wyzA-Z(]", addMultiply, exp) # Exclude x, as x is used for multiplying
+# Numbers can have an exponent, eg 1.5e3, and inf and nan are numbers too, as they are for float.
+numberPattern = re.compile(r"(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:e[+-]?[0-9]+)?|infinity|inf|nan", re.IGNORECASE)
 
-    return exp
-    
+# Versions of the functions that work on whole numpy arrays at once, for evaluateMany.
+manyVersions = {}
+if numpy is not None:
+    manyVersions = {operator.add: operator.add, operator.sub: operator.sub, operator.mul: operator.mul, operator.truediv: operator.truediv,
+                    operator.neg: operator.neg, math.pow: numpy.power, math.sqrt: numpy.sqrt, math.cos: numpy.cos, math.sin: numpy.sin,
+                    math.tan: numpy.tan, math.asin: numpy.arcsin, math.acos: numpy.arccos, math.atan: numpy.arctan, math.sinh: numpy.sinh,
+                    math.cosh: numpy.cosh, math.tanh: numpy.tanh, math.exp: numpy.exp, math.log: numpy.log, math.log10: numpy.log10,
+                    abs: numpy.abs, math.degrees: numpy.degrees, math.radians: numpy.radians}
 
-def evaluateExpression(exp, openBrackets, closeBrackets, functions, symbols):
+class Registry(object):
     '''
-    This function takes a mathematical expression as a string, and returns the equivalent floating point number.
-    It also takes a list of openBrackets, closeBrackets, functions and symbols that may be used in the expression.
+    Finds the functions, symbols and variables that can be used in expressions by name.
+    Names are kept in a prefix tree (a dictionary for each character, with the entry for a name that ends there under ""),
+    so finding the name at a position in an expression only looks at the characters of that name, however many there are,
+    and the longest name always wins (eg sinh over sin, or exp over e).
+    A registry can have a parent, which is also searched, with names in the child winning when they are the same length.
     '''
 
-    # The program attempts the following simplifications in order:
-        # Check if the expression is now a valid float or symbol
-        # Remove excess brackets
-        # Process +/- signs outside of brackets
-        # Process functions at the start of expressions
-        # Process times/divide signs outside of brackets
-        # Process ^ powers
-
-    # Check if the expression is now a valid float
-    if validFloat(exp):
-        return float(exp)
-
-    # Check if the expression is now a valid symbol
-    sym = validSymbol(exp, symbols)
-    if sym != None:
-        return sym.value
-
-    # Remove excess brackets
-    if removableBrackets(exp, openBrackets, closeBrackets):
-        return evaluateExpression(exp[1:-1], openBrackets, closeBrackets, functions, symbols)
-
-    # Process +/- signs outside of brackets
-    plusMinusSplit, operators = splitOutsideBrackets(exp, openBrackets, closeBrackets, ["+", "-"])
-    if len(plusMinusSplit) != 1:
-        add = lambda x, y: x + y
-        minus = lambda x, y: x - y
-        return applyOperators(plusMinusSplit, operators, openBrackets, closeBrackets, functions, symbols, ["+", "-"], [add, minus], 0)
-
-    # Process functions at the start of expressions
-    startingFunction = startsWithFunction(exp, functions)
-    if startingFunction != None:
-        return applyFunction(exp, startingFunction, openBrackets, closeBrackets, functions, symbols)
-
-    # Process times/divide signs outside of brackets
-    timesDivideSplit, operators = splitOutsideBrackets(exp, openBrackets, closeBrackets, ["*","x", "/"])
-    if len(timesDivideSplit) != 1:
-        times = lambda x, y: x * y
-        divide = lambda x, y: x / y
-        return applyOperators(timesDivideSplit, operators, openBrackets, closeBrackets, functions, symbols, ["*", "x", "/"], [times, times, divide], 1)
-
-    # Process ^ powers
-    powerSplit, operators = splitOutsideBrackets(exp, openBrackets, closeBrackets, ["^"])
-    if len(powerSplit) != 1:
-        return applyOperators(powerSplit, operators, openBrackets, closeBrackets, functions, symbols, ["^"], [pow], 1)
-
-    raise
-
-def validFloat(exp):
+    def __init__(self, functions = (), symbols = (), variables = (), parent = None):
+        self.root = {}
+        self.parent = parent
+        for fun in functions:
+            self.add(fun.symbol, ("function", fun))
+        for sym in symbols:
+            self.add(sym.symbol, ("symbol", sym))
+        for name in variables:
+            self.add(name, ("variable", name))
+
+    def add(self, name, entry):
+        '''
+        Adds a name, with the (kind, value) pair the tokenizer should give for it, replacing anything with the same name.
+        '''
+        node = self.root
+        for character in name:
+            node = node.setdefault(character, {})
+        node[""] = entry
+
+    def longestMatch(self, exp, position):
+        '''
+        Returns the entry for the longest name at position in exp and the length of the name, or (None, 0) if there isn't one.
+        '''
+        found, length = None, 0
+        node = self.root
+        index = position
+        while index < len(exp):
+            node = node.get(exp[index])
+            if node is None:
+                break
+            index += 1
+            if "" in node:
+                found, length = node[""], index - position
+
+        if self.parent is not None:
+            parentFound, parentLength = self.parent.longestMatch(exp, position)
+            if parentLength > length:
+                return parentFound, parentLength
+        return found, length
+
+def simplify(program):
     '''
-    Checks if an expression is now just a number, by converting it and seeing if it fails.
+    Turns a reverse Polish program into code that works on a list of registers, doing as much of the work as possible now.
+    Anything that only depends on numbers and symbols is worked out straight away (constant folding), and anything that
+    appears more than once is only worked out once (common subexpression elimination, by numbering each different value).
+    Returns the starting registers (with the constants already in), a list of (register, name) for the variables to load,
+    a list of (register, function, first register, second register or None) steps, and the register with the answer in.
+    Parts that fail when worked out now (eg 1/0) are left for evaluating, so they raise an error then instead.
     '''
+    registers = []
+    loads = []
+    code = []
+    numbers = {} # The register for each different value
+
+    def registerFor(key, value = None):
+        if not key in numbers:
+            numbers[key] = len(registers)
+            registers.append(value)
+        return numbers[key]
+
+    constants = set() # Registers that only hold a constant
+    def constant(value):
+        register = registerFor(("push", repr(value)), value)
+        constants.add(register)
+        return register
+
+    stack = []
+    for kind, value in program:
+        if kind == "push":
+            stack.append(constant(value))
+
+        elif kind == "load":
+            register = registerFor(("load", value))
+            if not (register, value) in loads:
+                loads.append((register, value))
+            stack.append(register)
 
-    try:
-        float(exp)
-        return True
-    except ValueError:
-        return False
-        
-
-def validSymbol(exp, symbols):
+        else:
+            if kind == "unary":
+                operands = (stack.pop(), None)
+            else:
+                right = stack.pop()
+                operands = (stack.pop(), right)
+                if value in (operator.add, operator.mul) and operands[1] < operands[0]:
+                    operands = (right, operands[0]) # The same either way round
+
+            if all(operand is None or operand in constants for operand in operands):
+                try:
+                    if operands[1] is None:
+                        stack.append(constant(value(registers[operands[0]])))
+                    else:
+                        stack.append(constant(value(registers[operands[0]], registers[operands[1]])))
+                    continue
+                except (ZeroDivisionError, OverflowError, ValueError):
+                    pass
+
+            key = (kind, value) + operands
+            isNew = not key in numbers
+            register = registerFor(key)
+            if isNew:
+                code.append((register, value) + operands)
+            stack.append(register)
+
+    return registers, loads, code, stack[0]
+
+class CompiledExpression(object):
     '''
-    Checks if an expression is now a predefined symbol
-    It takes an expression as a string, and returns a symbol (or None).
+    An expression that has already been read, so it can be evaluated as many times as needed without reading it again.
+    The program is a list of steps in reverse Polish notation, each one of:
+        ("push", value) puts a number on the stack.
+        ("load", name) puts the value of a variable on the stack.
+        ("unary", function) applies a function to the number on top of the stack.
+        ("binary", function) takes the top two numbers off the stack and puts back function(second from top, top).
+    It is then simplified into code for evaluating, so only the work that depends on the variables is done each time.
     '''
 
-    # Check against each symbol to see if the expression is one of them.
-    for sym in symbols:
-        if sym.symbol == exp:
-            return sym
+    def __init__(self, text, program):
+        self.text = text
+        self.program = program
+        self.registers, self.loads, self.code, self.result = simplify(program)
+        self.variables = sorted(set(name for register, name in self.loads)) # The variables it actually uses
 
-    # If the symbol isn't found, return None
-    return None
+    def isConstant(self):
+        # Whether the answer is the same every time, because it has no variables and nothing was left for evaluating.
+        return not self.loads and not self.code
 
-def removableBrackets(exp, openBrackets, closeBrackets):
+    def evaluate(self, values = {}):
+        '''
+        Runs the code with values (a dictionary of a number for each variable), and returns the value of the expression as a float.
+        Maths errors (eg dividing by zero or the square root of a negative) raise a ValueError.
+        '''
+        registers = list(self.registers)
+        try:
+            for register, name in self.loads:
+                registers[register] = values[name]
+            for register, function, first, second in self.code:
+                if second is None:
+                    registers[register] = function(registers[first])
+                else:
+                    registers[register] = function(registers[first], registers[second])
+        except KeyError as error:
+            raise ValueError("No value was given for " + str(error.args[0]) + " in " + self.text + ".")
+        except (ZeroDivisionError, OverflowError, ValueError) as error:
+            raise ValueError("Can't evaluate " + self.text + ": " + str(error))
+        return float(registers[self.result])
+
+    def evaluateMany(self, values):
+        '''
+        Evaluates the expression for lots of sets of values at once, eg every time in a time series.
+        values is a dictionary of a list of numbers for each variable (all the same length), or a single number to use every time.
+        Returns the answers in order, as a numpy array if numpy is installed and array('d') otherwise.
+        With numpy, the code runs once on whole arrays, as long as every function has a version in manyVersions.
+        '''
+        lengths = set(len(numbers) for numbers in values.values() if hasattr(numbers, "__len__"))
+        if len(lengths) > 1:
+            raise ValueError("All the lists of values need to be the same length.")
+        count = lengths.pop() if lengths else 1
+
+        if numpy is None or not all(step[1] in manyVersions for step in self.code):
+            answers = array('d')
+            for index in range(count):
+                answers.append(self.evaluate(dict((name, numbers[index] if hasattr(numbers, "__len__") else numbers)
+                                                  for name, numbers in values.items())))
+            return numpy.array(answers) if numpy is not None else answers
+
+        registers = list(self.registers)
+        try:
+            for register, name in self.loads:
+                registers[register] = numpy.asarray(values[name], dtype = float)
+            with numpy.errstate(divide = "raise", invalid = "raise", over = "raise"):
+                for register, function, first, second in self.code:
+                    if second is None:
+                        registers[register] = manyVersions[function](registers[first])
+                    else:
+                        registers[register] = manyVersions[function](registers[first], registers[second])
+        except KeyError as error:
+            raise ValueError("No value was given for " + str(error.args[0]) + " in " + self.text + ".")
+        except FloatingPointError as error:
+            raise ValueError("Can't evaluate " + self.text + ": " + str(error))
+        return numpy.array(numpy.broadcast_to(registers[self.result], (count,)), dtype = float) # Copied, so it can be changed
+
+class ExpressionCache(object):
     '''
-    This function takes an expression and a list of possible open and close brackets and returns a boolean stating whether there are removable brackets.
+    Remembers the most recently used compiled expressions, up to maxSize of them, forgetting the least recently used first.
+    hits and misses count how often an expression was found, for checking the cache is big enough.
     '''
-    
-    if not (exp[0] in openBrackets and exp[-1] in closeBrackets):
-        # There isn't a bracket at the beginning or at the end, so it can't be surrounded.
-        return False
 
-    # bracketCount counts the net (open brackets are + and close brackets are -) number of brackets encountered so far.
-    bracketCount = 1
-    
-    for character in exp[1:-1]:
-        
-        if character in openBrackets:
-            bracketCount += 1
-            
-        elif character in closeBrackets:
-            bracketCount -= 1
-            if bracketCount == 0:
-                # You are out of all the brackets, so it isn't surrounded.
-                return False
+    def __init__(self, maxSize = 256):
+        self.maxSize = maxSize
+        self.entries = OrderedDict() # Least recently used first
+        self.hits = 0
+        self.misses = 0
 
-    # The expression never got out of all the brackets, so it is surrounded.
-    return True
+    def __len__(self):
+        return len(self.entries)
 
-def splitOutsideBrackets(exp, openBrackets, closeBrackets, splittingOperators):
+    def get(self, key):
+        '''
+        Returns the compiled expression for a key (the expression after prepareExpression and a tuple of its variables), or None.
+        '''
+        compiled = self.entries.pop(key, None)
+        if compiled is None:
+            self.misses += 1
+            return None
+        self.entries[key] = compiled # Put it back at the most recently used end.
+        self.hits += 1
+        return compiled
+
+    def add(self, key, compiled):
+        self.entries[key] = compiled
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last = False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+# The brackets, functions and symbols that can be used in fullEvaluate. Use addFunction and addSymbol to add more.
+openBrackets = ["(", "[", "{"]
+closeBrackets = [")", "]", "}"]
+functions = [Function("sqrt", math.sqrt), Function("cos", math.cos), Function("sin", math.sin), Function("tan", math.tan),
+             Function("asin", math.asin), Function("acos", math.acos), Function("atan", math.atan),
+             Function("sinh", math.sinh), Function("cosh", math.cosh), Function("tanh", math.tanh),
+             Function("exp", math.exp), Function("ln", math.log), Function("log", math.log10), Function("abs", abs),
+             Function("degrees", math.degrees), Function("radians", math.radians)]
+symbols = [Symbol("pi", math.pi), Symbol("e", math.e)]
+fullRegistry = Registry(functions, symbols)
+
+compiledExpressions = ExpressionCache()
+
+def addFunction(symbol, applyFunction, applyMany = None):
     '''
-    This function takes a mathematical expression as a string and a list of opening brackets, closing brackets and operators to be split by.
-    It splits the expression into a list of strings split by any of these operators out of all brackets.
-    It returns two lists: the split expressions and the operators joining them.
+    Lets fullEvaluate use a new function (or replaces one with the same name). applyMany is a version that works on whole
+    numpy arrays, for evaluateMany.
     '''
+    fun = Function(symbol, applyFunction)
+    functions.append(fun)
+    fullRegistry.add(symbol, ("function", fun))
+    if applyMany is not None:
+        manyVersions[applyFunction] = applyMany
+    compiledExpressions.clear() # Expressions might be read differently now.
+
+def addSymbol(symbol, value):
+    '''
+    Lets fullEvaluate use a new symbol (or replaces one with the same name).
+    '''
+    sym = Symbol(symbol, value)
+    symbols.append(sym)
+    fullRegistry.add(symbol, ("symbol", sym))
+    compiledExpressions.clear()
 
-    # operands is a list of the split expressions.
-    operands = []
-
-    # operators is a list of the operators the expression is split by.
-    operators = []
-
-    # lastExpression collects the expression since a relevant operator was last found.
-    lastExpression = ""
-
-    # bracketCount counts the net (open brackets are positive and close brackets are negative) number of brackets encountered so far.
-    bracketCount = 0
-
-    for symbol in exp:
-        if symbol in openBrackets:
-            bracketCount += 1
-
-        elif symbol in closeBrackets:
-            bracketCount -= 1
-
-        # A new if is used (rather than elif) as the else should happen in the first two cases.
-        if bracketCount == 0 and symbol in splittingOperators:
-            # A plus/minus has been found, so split the expression.
-            operands.append(lastExpression)
-            operators.append(symbol)
-            lastExpression = ""
-
-        else:
-            # Add the symbol to the end of lastExpression and keep going.
-            lastExpression += symbol
-
-    # Add the final operand to the list.
-    operands.append(lastExpression)
-    
-    return operands, operators
+def basicEvaluate(exp):
+    '''
+    Evaluates an expression with only the simple brackets and no extra symbols or functions, for testing.
+    '''
+    return evaluateExpression(exp, ["("], [")"], [], [])
 
-def startsWithFunction(exp, functions):
+def fullEvaluate(exp):
     '''
-    Checks whether the expression starts with any of the functions.
+    Takes an expression as a string, and returns an equivalent float.
     '''
-    
-    # Check each function to see if it starts with that
-    for fun in functions:
-        if exp.startswith(fun.symbol):
-            return fun
+    return fullCompile(exp).evaluate()
 
-    # If it doesn't start with a function
-    return None
-    
+def fullCompile(exp, variables = ()):
+    '''
+    Takes an expression as a string, and returns it compiled with all the brackets, functions and symbols, and the names
+    of any variables it can use (eg ["t", "v"]), to be given values when it is evaluated.
+    Expressions that have been compiled recently are remembered, so eg typing the same value again doesn't read it again.
+    '''
+    key = (prepareExpression(exp), tuple(variables))
+    compiled = compiledExpressions.get(key)
+    if compiled is None:
+        compiled = compileExpression(key[0], openBrackets, closeBrackets, functions, symbols, variables, fullRegistry)
+        compiledExpressions.add(key, compiled)
+    return compiled
 
-def applyOperators(operands, operators, openBrackets, closeBrackets, functions, symbols, operatorSymbols, operatorFunctions, identity):
+def prepareExpression(exp):
     '''
-    This function takes a list of operands and operators, all information needed for evaluating (openBrackets, closeBrackets, functions and symbols)
-    and a list of operatorSymbols to apply and their corresponding operatorFunctions. It returns a float made from evaluating them.
+    Prepares an expression for the evaluateExpression function by making the format easier and less ambiguous.
     '''
 
-    # Check for an empty starting string (a leading minus)
-    if operands[0] == "":
-        answer = identity
-    else: 
-        # Evaluate the first operand and set this to the answer.
-        answer = evaluateExpression(operands[0], openBrackets, closeBrackets, functions, symbols)
+    # Remove spaces, so eg 1 000 is a thousand. Implicit multiplication is found when the expression is read.
+    return "".join(exp.split())
 
-    # Pair the remaining operands and operators.
-    for exp, sym in zip(operands[1:], operators):
-        # Evaluate the next operand
-        new = evaluateExpression(exp, openBrackets, closeBrackets, functions, symbols)
+def evaluateExpression(exp, openBrackets, closeBrackets, functions, symbols, values = {}):
+    '''
+    This function takes a mathematical expression as a string, and returns the equivalent floating point number.
+    It also takes a list of openBrackets, closeBrackets, functions and symbols that may be used in the expression,
+    and a dictionary of values for any variables in it.
+    '''
+    exp = prepareExpression(exp) # So spaces are fine here too, as they are in fullEvaluate.
+    return compileExpression(exp, openBrackets, closeBrackets, functions, symbols, sorted(values)).evaluate(values)
 
-        # Apply the function at the same position in operatorFunctions as the symbol is in operatorSymbols
-        answer = operatorFunctions[operatorSymbols.index(sym)](answer, new)
+def tokenize(exp, openBrackets, closeBrackets, registry):
+    '''
+    Reads through an expression once, giving a (kind, value) pair for each part of it in order. The kinds are:
+        "number" with a float, "symbol" with a Symbol, "function" with a Function, "variable" with its name,
+        "operator" with its character, and "open" and "close" with the index of the bracket in openBrackets or closeBrackets.
+    Names are looked up in registry.
+    Raises a ValueError for anything that isn't recognised.
+    '''
+    position = 0
+    while position < len(exp):
+        character = exp[position]
 
-    return answer
+        number = numberPattern.match(exp, position)
+        if number:
+            yield "number", float(number.group())
+            position = number.end()
+            continue
 
-def applyFunction(exp, function, openBrackets, closeBrackets, functions, symbols):
+        if character in openBrackets:
+            yield "open", openBrackets.index(character)
+            position += 1
+            continue
+
+        if character in closeBrackets:
+            yield "close", closeBrackets.index(character)
+            position += 1
+            continue
+
+        # Names are checked before operators, so eg x is a variable rather than times if it is one.
+        entry, length = registry.longestMatch(exp, position)
+        if entry is not None:
+            yield entry
+            position += length
+            continue
+
+        if character in binaryOperators:
+            yield "operator", character
+            position += 1
+            continue
+
+        raise ValueError("Didn't recognise " + exp[position:] + ".")
+
+def compileExpression(exp, openBrackets, closeBrackets, functions, symbols, variables = (), registry = None):
     '''
-    This function takes an expression as a string, a function that the expression starts with and all the other information needed for evaluating
-    and returns the float equivalent to the expression.
+    Reads an expression (which should already have been through prepareExpression) and returns it as a CompiledExpression.
+    variables is a list of the names that can be given values when it is evaluated.
+    registry can be a Registry already holding the functions and symbols, so it doesn't need building again.
+    Raises a ValueError if the expression isn't valid, eg if a bracket isn't closed or an operator is missing a number.
     '''
+    program = []
+
+    # Operators and brackets waiting for what comes after them. Entries are ("open", bracket index), ("call", function)
+    # for a function with brackets (waiting for its closing bracket), or (kind, function, precedence, right to left) for operators.
+    waiting = []
+
+    def addOperator(function, precedence, rightToLeft):
+        # Anything waiting that should be done first goes into the program.
+        while waiting and len(waiting[-1]) == 4:
+            topPrecedence = waiting[-1][2]
+            if topPrecedence > precedence or (topPrecedence == precedence and not rightToLeft):
+                program.append(waiting.pop()[:2])
+            else:
+                break
+        waiting.append(("binary", function, precedence, rightToLeft))
+
+    def inPower():
+        # Whether a ^ inside the current brackets is still waiting for its power to finish.
+        for entry in reversed(waiting):
+            if len(entry) != 4:
+                return False
+            if entry[1] is math.pow:
+                return True
+        return False
 
-    # Remove the first bit of exp, as this is the function name.
-    remainingExpression = exp[len(function.symbol):]
-
-    # If the function argument is surrounded by brackets, apply the function to these brackets only.
-    if remainingExpression[0] in openBrackets:
-
-        # bracketCount counts the brackets so far, to make sure you are in the outer layer of brackets.
-        bracketCount = 0
-
-        # functionalAppliedTo accumulates the expression
-        functionAppliedTo = ""
-
-        # Go through each symbol, changing bracketCount appropriately.
-        for symbolCount in range(len(remainingExpression)):
-            
-            symbol = remainingExpression[symbolCount]
-            functionAppliedTo += symbol
-            
-            if symbol in openBrackets:
-                bracketCount += 1
-                
-            elif symbol in closeBrackets:
-                bracketCount -= 1
-
-                # If the bracket you just exited, is the outer layer, then you need to evaluate.
-                if bracketCount == 0:
-                    # newExp evaluates the function to make a simpler expression
-                    newExp = str(function.applyFunction(evaluateExpression(functionAppliedTo, openBrackets, closeBrackets, functions, symbols))) + \
-                             remainingExpression[symbolCount + 1:]
-
-                    # Now evaluate newExp, and return that.
-                    return evaluateExpression(newExp, openBrackets, closeBrackets, functions, symbols)
-                
-    else:
-        # If not surrounded by brackets, the function is applied to the rest of the expression.
-        return function.applyFunction(evaluateExpression(remainingExpression, openBrackets, closeBrackets, functions, symbols))
\ No newline at end of file
+    expectingValue = True # Whether the next part should be a value (rather than an operator or a closing bracket)
+    lastKind = None
+    function = None # A function waiting to see if it has brackets
+    if registry is None:
+        registry = Registry(functions, symbols, variables)
+    elif variables:
+        registry = Registry(variables = variables, parent = registry)
+
+    for kind, value in tokenize(exp, openBrackets, closeBrackets, registry):
+        if function is not None:
+            if kind == "open":
+                waiting.append(("call", function.applyFunction))
+            else:
+                # Without brackets, the function applies to the whole term after it.
+                waiting.append(("unary", function.applyFunction, functionPrecedence, True))
+            function = None
+
+        if kind in ("number", "symbol", "variable", "function", "open") and not expectingValue:
+            if kind == "number" and lastKind == "number":
+                raise ValueError("Two numbers in a row in " + exp + ".")
+            if inPower():
+                addOperator(operator.mul, implicitPowerPrecedence, False)
+            else:
+                addOperator(*binaryOperators["*"]) # Implicit multiplication, eg 2pi or (1 + 2)(3 + 4)
+            expectingValue = True
+
+        if kind == "number":
+            program.append(("push", value))
+            expectingValue = False
+
+        elif kind == "symbol":
+            program.append(("push", value.value))
+            expectingValue = False
+
+        elif kind == "variable":
+            program.append(("load", value))
+            expectingValue = False
+
+        elif kind == "function":
+            function = value
+
+        elif kind == "open":
+            waiting.append(("open", value))
+
+        elif kind == "close":
+            if expectingValue:
+                raise ValueError("Something is missing before " + closeBrackets[value] + " in " + exp + ".")
+            while waiting and waiting[-1][0] != "open":
+                program.append(waiting.pop()[:2])
+            if not waiting:
+                raise ValueError("There is a " + closeBrackets[value] + " without an opening bracket in " + exp + ".")
+            if waiting.pop()[1] != value:
+                raise ValueError("The brackets don't match in " + exp + ".")
+            if waiting and waiting[-1][0] == "call":
+                program.append(("unary", waiting.pop()[1]))
+
+        elif expectingValue:
+            # An operator where a value should be can only be a sign.
+            if value == "-":
+                waiting.append(("unary", operator.neg, negativePrecedence, True))
+            elif value != "+":
+                raise ValueError(value + " needs something before it in " + exp + ".")
+
+        else:
+            addOperator(*binaryOperators[value])
+            expectingValue = True
+
+        lastKind = kind
+
+    if function is not None:
+        raise ValueError(function.symbol + " needs something to apply to.")
+    if not program:
+        raise ValueError("There is nothing to evaluate.")
+    if expectingValue:
+        raise ValueError("The expression " + exp + " isn't finished.")
+    while waiting:
+        if waiting[-1][0] in ("open", "call"):
+            raise ValueError("Not all the brackets in " + exp + " are closed.")
+        program.append(waiting.pop()[:2])
+
+    return CompiledExpression(exp, program)
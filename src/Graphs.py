@@ -104,4 +104,16 @@ class Graph(object):
         
         if self.x > self.relWidth:
             self.display()
+
+    def getState(self):
+        '''
+        Returns where the graph has got to, for setState to go back to.
+        '''
+        return (self.x, list(self.oldX), list(self.oldY))
+
+    def setState(self, state):
+        # Carries on drawing from a state from getState (anything drawn since is left on the screen).
+        self.x = state[0]
+        self.oldX = list(state[1])
+        self.oldY = list(state[2])
     
\ No newline at end of file
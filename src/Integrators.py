@@ -0,0 +1,198 @@
+# TODO:
+
+# Each integrator moves a position and velocity on by one tick, given a function for the acceleration.
+# They only use +, - and multiplying by numbers, so they work for Vectors and plain floats alike.
+# Vectors given as the position and velocity are moved on in place rather than replaced, so ticks don't keep making new ones.
+
+def addScaled(value, change, number):
+    '''
+    Returns value + change * number, changing value in place if it is a Vector (or a VectorBatch), as floats can't be changed.
+    '''
+    if hasattr(value, "addScaled"):
+        return value.addScaled(change, number)
+    return value + change * number
+
+class Integrator(object):
+    '''
+    The base class for numerical integrators.
+    '''
+
+    def step(self, position, velocity, accelerationAt, time):
+        '''
+        Takes a position, velocity, a function accelerationAt(position, velocity) and a time.
+        Returns the new position, the new velocity and the acceleration at the start of the tick. Vectors given may be changed.
+        The function will actually do things for specific integrators.
+        '''
+        pass
+
+class ExplicitEuler(Integrator):
+    '''
+    Moves with the old velocity and then updates the velocity. Simple, but energy grows every tick.
+    '''
+
+    def step(self, position, velocity, accelerationAt, time):
+        acceleration = accelerationAt(position, velocity)
+        position = addScaled(position, velocity, time)
+        return position, addScaled(velocity, acceleration, time), acceleration
+
+class SymplecticEuler(Integrator):
+    '''
+    Updates the velocity first and then moves with the new velocity (semi-implicit Euler).
+    This is what the simulations have always used. Energy wobbles but doesn't drift away.
+    '''
+
+    def step(self, position, velocity, accelerationAt, time):
+        acceleration = accelerationAt(position, velocity)
+        velocity = addScaled(velocity, acceleration, time)
+        return addScaled(position, velocity, time), velocity, acceleration
+
+class VelocityVerlet(Integrator):
+    '''
+    Velocity Verlet (leapfrog), which is second order and symplectic for forces that only depend on position.
+    '''
+
+    def step(self, position, velocity, accelerationAt, time):
+        acceleration = accelerationAt(position, velocity)
+        # The velocity at the end is guessed with Euler, in case the force depends on it.
+        guessedVelocity = velocity + acceleration * time
+        newPosition = addScaled(addScaled(position, velocity, time), acceleration, 0.5 * time ** 2)
+        newAcceleration = accelerationAt(newPosition, guessedVelocity)
+        newVelocity = addScaled(velocity, acceleration + newAcceleration, 0.5 * time)
+        return newPosition, newVelocity, acceleration
+
+class RungeKutta4(Integrator):
+    '''
+    The classic fourth order Runge-Kutta method, using four evaluations of the acceleration per tick.
+    '''
+
+    def step(self, position, velocity, accelerationAt, time):
+        halfTime = 0.5 * time
+
+        a1 = accelerationAt(position, velocity)
+        v1 = velocity
+
+        v2 = velocity + a1 * halfTime
+        a2 = accelerationAt(position + v1 * halfTime, v2)
+
+        v3 = velocity + a2 * halfTime
+        a3 = accelerationAt(position + v2 * halfTime, v3)
+
+        v4 = velocity + a3 * time
+        a4 = accelerationAt(position + v3 * time, v4)
+
+        # The position goes first, as v1 is the velocity before the tick.
+        newPosition = addScaled(position, v1 + v2 * 2 + v3 * 2 + v4, time / 6.0)
+        newVelocity = addScaled(velocity, a1 + a2 * 2 + a3 * 2 + a4, time / 6.0)
+        return newPosition, newVelocity, a1
+
+class ForestRuth(Integrator):
+    '''
+    A fourth order symplectic integrator made of three drift-kick steps, for long runs where energy has to stay put.
+    '''
+
+    theta = 1.0 / (2.0 - 2.0 ** (1.0 / 3.0))
+
+    def step(self, position, velocity, accelerationAt, time):
+        theta = self.theta
+        acceleration = accelerationAt(position, velocity)
+
+        position = addScaled(position, velocity, 0.5 * theta * time)
+        velocity = addScaled(velocity, accelerationAt(position, velocity), theta * time)
+        position = addScaled(position, velocity, 0.5 * (1 - theta) * time)
+        velocity = addScaled(velocity, accelerationAt(position, velocity), (1 - 2 * theta) * time)
+        position = addScaled(position, velocity, 0.5 * (1 - theta) * time)
+        velocity = addScaled(velocity, accelerationAt(position, velocity), theta * time)
+        position = addScaled(position, velocity, 0.5 * theta * time)
+        return position, velocity, acceleration
+
+class AdaptiveRungeKutta45(Integrator):
+    '''
+    The Dormand-Prince embedded Runge-Kutta method. Each tick is split into however many steps are needed to keep the estimated
+    error of each step within tolerance, so it takes big steps when the motion is gentle and small ones when it is not.
+    The last step size is remembered for the next tick, so each object needs its own AdaptiveRungeKutta45.
+    '''
+
+    # The Butcher tableau. The last row of a is also the fifth order weights, so the final stage gives the acceleration
+    # at the end of the step, which is reused as the first stage of the next step.
+    a = [[],
+         [1 / 5.0],
+         [3 / 40.0, 9 / 40.0],
+         [44 / 45.0, -56 / 15.0, 32 / 9.0],
+         [19372 / 6561.0, -25360 / 2187.0, 64448 / 6561.0, -212 / 729.0],
+         [9017 / 3168.0, -355 / 33.0, 46732 / 5247.0, 49 / 176.0, -5103 / 18656.0],
+         [35 / 384.0, 0.0, 500 / 1113.0, 125 / 192.0, -2187 / 6784.0, 11 / 84.0]]
+
+    # The difference between the fifth and fourth order weights, which estimates the error.
+    errorWeights = [35 / 384.0 - 5179 / 57600.0, 0.0, 500 / 1113.0 - 7571 / 16695.0, 125 / 192.0 - 393 / 640.0,
+                    -2187 / 6784.0 + 92097 / 339200.0, 11 / 84.0 - 187 / 2100.0, -1 / 40.0]
+
+    def __init__(self, tolerance = 1e-6, minStep = 1e-5):
+        '''
+        The tolerance is the largest error allowed in each step, relative to the size of the position and velocity (or absolute
+        when they are smaller than 1). Steps never get smaller than minStep seconds.
+        '''
+        self.tolerance = tolerance
+        self.minStep = minStep
+        self.stepSize = None # Step size to try first, carried over from the last tick.
+
+        # Counters, to see how much work the steps are taking.
+        self.stepsTaken = 0
+        self.stepsRejected = 0
+
+    def step(self, position, velocity, accelerationAt, time):
+        acceleration = accelerationAt(position, velocity)
+        firstAcceleration = acceleration
+        remaining = time
+        proposed = self.stepSize or time
+
+        while remaining > time * 1e-9:
+            h = min(proposed, remaining)
+            newPosition, newVelocity, newAcceleration, error = self.tryStep(position, velocity, acceleration, accelerationAt, h)
+            error /= self.tolerance * max(1.0, abs(position), abs(velocity))
+
+            # Standard step size control, not letting it change too much at once
+            if error == 0:
+                factor = 5.0
+            else:
+                factor = min(5.0, max(0.2, 0.9 * error ** -0.2))
+
+            if error <= 1.0 or h <= self.minStep:
+                self.stepsTaken += 1
+                position, velocity, acceleration = newPosition, newVelocity, newAcceleration
+                remaining -= h
+                # If the step was cut short to finish the tick, don't let that shrink the next one.
+                proposed = max(proposed, h * factor) if h < proposed else h * factor
+            else:
+                self.stepsRejected += 1
+                proposed = max(h * factor, self.minStep)
+
+        self.stepSize = proposed
+        return position, velocity, firstAcceleration
+
+    def tryStep(self, position, velocity, acceleration, accelerationAt, h):
+        '''
+        Takes one Dormand-Prince step of size h.
+        Returns the new position, velocity and acceleration, and an estimate of the error in the step.
+        '''
+        velocities = [velocity]
+        accelerations = [acceleration]
+
+        for row in self.a[1:]:
+            stagePosition = position
+            stageVelocity = velocity
+            for weight, v, acc in zip(row, velocities, accelerations):
+                if weight != 0:
+                    stagePosition = stagePosition + v * (weight * h)
+                    stageVelocity = stageVelocity + acc * (weight * h)
+            velocities.append(stageVelocity)
+            accelerations.append(accelerationAt(stagePosition, stageVelocity))
+
+        # The final stage was taken at the fifth order answer
+        positionError = velocities[0] * (self.errorWeights[0] * h)
+        velocityError = accelerations[0] * (self.errorWeights[0] * h)
+        for weight, v, acc in zip(self.errorWeights[1:], velocities[1:], accelerations[1:]):
+            if weight != 0:
+                positionError = positionError + v * (weight * h)
+                velocityError = velocityError + acc * (weight * h)
+
+        return stagePosition, stageVelocity, accelerations[-1], max(abs(positionError), abs(velocityError))
@@ -16,15 +16,43 @@ class Parameter(object):
         self.name = name
         self.inputs = inputs
         self.initial = initial    
-        self.setParameter(initial)   
+        self.version = 0 # Goes up by one every time the value changes, so anything using it can tell if it needs to recalculate.
+        self.subscribers = [] # Functions called with the parameter whenever it changes
+        self.lock = None # If set, held while the value changes, eg so a physics thread never sees a change half made.
+        self.value = initial
+        for input in self.inputs:
+            input.setValue(initial)
         
     def setParameter(self, value):
         '''
-        Changes the value and the value of all other inputs.
+        Changes the value and the value of all other inputs, and lets any subscribers know.
+        Nothing happens if the value is the same as before.
         '''
+        if value == self.value:
+            return
+        if self.lock is not None:
+            with self.lock:
+                self.changeValue(value)
+        else:
+            self.changeValue(value)
+
+    def changeValue(self, value):
         self.value = value
+        self.version += 1
         for input in self.inputs:
             input.setValue(value)
+        for subscriber in self.subscribers:
+            subscriber(self)
+
+    def subscribe(self, subscriber):
+        '''
+        Calls subscriber(parameter) every time the value changes.
+        The parameter keeps a reference to the subscriber, so use unsubscribe for anything that doesn't last as long as it.
+        '''
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.remove(subscriber)
     
     def initialise(self):
         self.setParameter(self.initial)
@@ -276,7 +304,7 @@ class IntInputBox(InputBox):
     
         except:
             # Need to change to give helpful feedback!
-            print "Oops, error in evaluation"
+            print("Oops, error in evaluation")
 
 class Checkbox(object):
     '''
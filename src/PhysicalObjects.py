@@ -3,6 +3,7 @@
 
 from Vectors import Vector
 from RelativeDrawing import *
+from Integrators import SymplecticEuler
 
 # Defines colours needed in the simulation.
 black = color(0, 0, 0)
@@ -15,23 +16,38 @@ yellow = color(247, 247, 10)
 
 g = 9.8
 
+def copyValue(value):
+    '''
+    Copies anything that could be changed in place (Vectors and lists), so saved states can't be changed by the simulation.
+    '''
+    if isinstance(value, Vector):
+        return value.copy()
+    if isinstance(value, list):
+        return list(value)
+    return value
+
 class PhysicalObject(object):
     '''
     The base class for implementing Physical objects.
     '''
+
+    integrator = SymplecticEuler() # Simulations can swap in a different integrator for each object.
+    stateAttributes = ("position", "velocity", "acceleration", "drawPosition") # Everything that changes as the simulation runs
     
     def __init__(self, position, velocity, picture, scaling, relWidth, relHeight):
         '''
         Initialises a physical object. Picture should be loaded from a file, and scaling describes the relation between relative coordinates and metres.
         '''
 
-        self.position = position
-        self.velocity = velocity
+        # Copy the vectors, as they are changed in place and might be shared with whatever passed them in.
+        self.position = position.copy()
+        self.velocity = velocity.copy()
         self.picture = picture
         self.scaling = scaling
         self.relWidth = relWidth
         self.relHeight = relHeight
         self.acceleration = Vector(0, 0)
+        self.drawPosition = position.copy() # Where it is drawn, which can be in between ticks.
         
         self.updateFromInput() # Gets mass etc. from input
         self.updateToOutput
@@ -39,17 +55,31 @@ class PhysicalObject(object):
     
     def update(self, force, time):
         '''
-        Takes a force and a time, and updates velocity and position by one tick.
+        Takes a force and a time, and updates velocity and position by one tick using the object's integrator.
+        The force can be a Vector, or a function force(position, velocity) for integrators that need it at several points in the tick.
         '''
         self.updateFromInput() # Changes any attributes based on whether parameters have been changed by the user.
         
-        self.acceleration = force / self.mass
-        self.velocity += self.acceleration * time
-        self.position += self.velocity * time
+        if callable(force):
+            accelerationAt = lambda position, velocity: force(position, velocity) / self.mass
+        else:
+            acceleration = force / self.mass
+            accelerationAt = lambda position, velocity: acceleration
+        self.position, self.velocity, self.acceleration = self.integrator.step(self.position, self.velocity, accelerationAt, time)
         
         self.updateFromInput() # Keep updating to make sure there are no errors.
         self.updateToOutput()
     
+    def setMotion(self, position, velocity, acceleration):
+        '''
+        Puts the object straight into a given state (eg from an exact solution), instead of integrating to it.
+        '''
+        self.updateFromInput()
+        self.position = position
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.updateToOutput()
+
     def updateFromInput(self):
         '''
         This will update the appropriate things from input (such as mass parameters) if they have changed.
@@ -63,23 +93,71 @@ class PhysicalObject(object):
         The function will actually do things for specific objects. 
         '''
         pass
-    
+
+    def inputsChanged(self):
+        '''
+        Returns True if any parameter in inputParameters has changed since this was last called (and the first time it is called),
+        so values worked out from them only need working out again when it does.
+        '''
+        # Versions only ever go up, so the total changes whenever any one of them does.
+        versions = sum([parameter.version for parameter in self.inputParameters])
+        if versions == getattr(self, "inputVersions", None):
+            return False
+        self.inputVersions = versions
+        return True
+    
+    def renderState(self):
+        '''
+        Returns the numbers needed to draw the object as a tuple, or None if nothing about it moves.
+        By default this is the position.
+        '''
+        if hasattr(self, "position"):
+            return (self.position.x, self.position.y)
+        return None
+
+    def showState(self, state):
+        '''
+        Takes a tuple like the ones from renderState, and sets what will be drawn from it.
+        '''
+        self.drawPosition = Vector(state[0], state[1])
+
+    def interpolate(self, previous, current, alpha):
+        '''
+        Draws the object alpha of the way (from 0 to 1) between two render states, so drawing doesn't have to keep in step with the physics.
+        '''
+        self.showState(tuple([p + (c - p) * alpha for p, c in zip(previous, current)]))
+
     def display(self):
         '''
         Draws the image to the screen at the correct relative positions.
         '''
-        relXImage(self.picture, self.scaling * self.position.x, self.scaling * self.position.y, self.relWidth, self.relHeight)
+        relXImage(self.picture, self.scaling * self.drawPosition.x, self.scaling * self.drawPosition.y, self.relWidth, self.relHeight)
     
     def initialise(self):
         '''
         For some objects, it returns it to its initial state, eg on the spring.
         '''
         pass
+
+    def getState(self):
+        '''
+        Returns a copy of every attribute in stateAttributes, for setState to put back later.
+        '''
+        return [copyValue(getattr(self, name)) for name in self.stateAttributes]
+
+    def setState(self, state):
+        '''
+        Puts back a state from getState exactly. The state is copied again, so it can be put back more than once.
+        '''
+        for name, value in zip(self.stateAttributes, state):
+            setattr(self, name, copyValue(value))
         
 class Spring(PhysicalObject):
     '''
     A class that implements the behaviour of a spring.
     '''
+
+    stateAttributes = ("naturalLength", "stiffness", "extension", "totalLength", "drawTotalLength", "playing")
     
     def __init__(self, naturalLengthP, stiffnessP, numberOfCoils, initialExtensionP, topX, topY, scaling, tensionP, elasticEnergyP, radius):
         '''
@@ -99,6 +177,7 @@ class Spring(PhysicalObject):
         self.radius = radius
         
         self.update()
+        self.drawTotalLength = self.totalLength
     
     def update(self, bottomY = None):
         '''
@@ -117,6 +196,18 @@ class Spring(PhysicalObject):
         # Update parameters for graphs.
         self.tensionP.setParameter(self.extension * self.stiffness)
         self.elasticEnergyP.setParameter(0.5 * self.stiffness * self.extension ** 2)
+
+    def tensionAt(self, bottomY):
+        '''
+        Finds the tension the spring would have if its bottom was at bottomY, without changing anything.
+        '''
+        return self.stiffnessP.value * (bottomY - self.topY - 3 * self.radius - self.naturalLengthP.value)
+
+    def renderState(self):
+        return (self.totalLength,)
+
+    def showState(self, state):
+        self.drawTotalLength = state[0]
     
     def display(self):
         stroke(black) # All springs are drawn in black
@@ -126,7 +217,7 @@ class Spring(PhysicalObject):
         realX = self.topX * self.scaling
         realY = self.topY * self.scaling
         realRadius = self.radius * self.scaling
-        stepSize = (self.totalLength / (4.0 * self.numberOfCoils)) * self.scaling
+        stepSize = (self.drawTotalLength / (4.0 * self.numberOfCoils)) * self.scaling
         currentPosition = (self.topY + 2 * self.radius) * self.scaling      
         
         relXEllipse(realX, realY, 2 * realRadius, 2 * realRadius)
@@ -147,6 +238,8 @@ class Mass(PhysicalObject):
     '''
     The class for the masses attached to springs.
     '''
+
+    stateAttributes = PhysicalObject.stateAttributes + ("numberOfMasses", "mass")
     
     def __init__(self, position, velocity, numberOfMassesP, kineticEnergyP, displacementP, velocityP, accelerationP, scaling, relWidth, relHeight, borderColour, fillColour, massPerMass = 1.0):
         '''
@@ -161,11 +254,13 @@ class Mass(PhysicalObject):
         self.borderColour = borderColour
         self.fillColour = fillColour
         self.massPerMass = massPerMass
+        self.inputParameters = [numberOfMassesP]
         PhysicalObject.__init__(self, position, velocity, None, scaling, relWidth, relHeight)
         
     def updateFromInput(self):
-        self.numberOfMasses = self.numberOfMassesP.value
-        self.mass = self.massPerMass * self.numberOfMasses
+        if self.inputsChanged():
+            self.numberOfMasses = self.numberOfMassesP.value
+            self.mass = self.massPerMass * self.numberOfMasses
     
     def display(self):
         '''
@@ -175,8 +270,8 @@ class Mass(PhysicalObject):
         stroke(self.borderColour)
         
         # Set up scaled variables for drawing
-        leftSide = (self.position.x - self.relWidth / 2) * self.scaling
-        currentPosition = self.position.y * self.scaling
+        leftSide = (self.drawPosition.x - self.relWidth / 2) * self.scaling
+        currentPosition = self.drawPosition.y * self.scaling
         stepSize = self.relHeight * self.scaling
         
         for count in range(self.numberOfMasses):
@@ -191,7 +286,7 @@ class Mass(PhysicalObject):
         if force is None:
             if not bottom is None:
                 self.position = bottom
-            self.velocity = Vector(0, 0) # Reset the velocity to zero if is it paused or stopped.
+            self.velocity.set(0, 0) # Reset the velocity to zero if is it paused or stopped.
             self.updateFromInput()
         else:
             PhysicalObject.update(self, force, time)
@@ -207,6 +302,8 @@ class Coin(PhysicalObject):
     '''
     A class that implements the methods for drawing a coin.
     '''
+
+    stateAttributes = PhysicalObject.stateAttributes + ("onRoundabout", "mass", "mu", "requiredVelocity")
     
     def __init__(self, radius, position, velocity, scaling, relWidth, relHeight, fillColour, massP, radiusP, muP, omegaP, positionXP, positionYP, centre):
         self.fillColour = fillColour
@@ -221,64 +318,82 @@ class Coin(PhysicalObject):
         self.positionYP = positionYP
         self.initialPosition = position
         self.initialVelocity = velocity
+        self.inputParameters = [massP, radiusP, muP, omegaP]
         PhysicalObject.__init__(self, position, velocity, None, scaling, relWidth, relHeight)
     
     def display(self):
         stroke(0, 0, 0)
         fill(self.fillColour)
-        relXEllipse(self.position.x * self.scaling, self.position.y * self.scaling, self.relWidth * self.scaling, self.relHeight * self.scaling)
+        relXEllipse(self.drawPosition.x * self.scaling, self.drawPosition.y * self.scaling, self.relWidth * self.scaling, self.relHeight * self.scaling)
     
     def initialise(self):
         # Just call the __init__ function to reset everything.
         self.__init__(self.radius, self.initialPosition, self.initialVelocity, self.scaling, self.relWidth, self.relHeight, self.fillColour, self.massP, self.radiusP, self.muP, self.omegaP, self.positionXP, self.positionYP, self.centre)
      
     def updateFromInput(self):
-        self.mass = self.massP.value # Update mass from parameter
-        
-        requiredVelocity = self.omegaP.value * self.radiusP.value        
+        if self.inputsChanged():
+            self.mass = self.massP.value # Update mass from parameter
+            self.mu = self.muP.value
+            self.requiredVelocity = self.omegaP.value * self.radiusP.value
+        requiredVelocity = self.requiredVelocity
         
         if self.onRoundabout:
-            # Update position and velocity from radius, only before it has slipped
-            self.position = self.centre + (self.position - self.centre).scaleAbs(self.radiusP.value)
-        
-            self.velocity = Vector(-(self.position - self.centre).y, (self.position - self.centre).x).scaleAbs(requiredVelocity) # Always scale up the speed.
+            # Update position and velocity from radius, only before it has slipped.
+            # This runs twice a tick, so it works on the components in place rather than making new vectors.
+            offsetX = self.position.x - self.centre.x
+            offsetY = self.position.y - self.centre.y
+            distance = sqrt(offsetX ** 2 + offsetY ** 2)
+            if distance != 0:
+                offsetX *= self.radiusP.value / distance
+                offsetY *= self.radiusP.value / distance
+            self.position.set(self.centre.x + offsetX, self.centre.y + offsetY)
+        
+            self.velocity.set(-offsetY, offsetX).scaleAbsInPlace(requiredVelocity) # Always scale up the speed.
         else:
-            self.velocity = self.velocity.scaleAbs(requiredVelocity)
-        
-        self.mu = self.muP.value
+            self.velocity.scaleAbsInPlace(requiredVelocity)
     
     def updateToOutput(self):
-        self.positionXP.setParameter((self.position - self.centre).x)
-        self.positionYP.setParameter((self.centre - self.position).y) # As up is negative, calculate centre - position
+        self.positionXP.setParameter(self.position.x - self.centre.x)
+        self.positionYP.setParameter(self.centre.y - self.position.y) # As up is negative, calculate centre - position
     
     def findForce(self):
         if self.onRoundabout and g * self.mu > self.omegaP.value ** 2 * self.radiusP.value:
-            return (self.centre - self.position).scaleAbs(abs(self.velocity) ** 2 / self.radiusP.value * self.mass)
+            force = Vector(self.centre.x - self.position.x, self.centre.y - self.position.y)
+            return force.scaleAbsInPlace(abs(self.velocity) ** 2 / self.radiusP.value * self.mass)
         else:
             self.onRoundabout = False
             return Vector(0, 0) # Not very realistic, but works well for demonstrations
         
 class Roundabout(PhysicalObject):
+    stateAttributes = ("angle", "drawAngle")
+
     def __init__(self, omegaP, centre, radius, scaling):
         self.omegaP = omegaP
         self.centre = centre
         self.radius = radius
         self.angle = 0.0
+        self.drawAngle = 0.0
         self.scaling = scaling
         
     def update(self, time):
         self.angle += self.omegaP.value * time
+
+    def renderState(self):
+        return (self.angle,)
+
+    def showState(self, state):
+        self.drawAngle = state[0]
     
     def display(self):
         noStroke()
         fill(255, 14, 14)
-        relXArc(self.centre.x * self.scaling, self.centre.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling, self.angle, self.angle + HALF_PI)
+        relXArc(self.centre.x * self.scaling, self.centre.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling, self.drawAngle, self.drawAngle + HALF_PI)
         fill(30, 255, 14)
-        relXArc(self.centre.x * self.scaling, self.centre.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling, self.angle + HALF_PI, self.angle + PI)
+        relXArc(self.centre.x * self.scaling, self.centre.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling, self.drawAngle + HALF_PI, self.drawAngle + PI)
         fill(14, 167, 255)
-        relXArc(self.centre.x * self.scaling, self.centre.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling, self.angle + PI, self.angle + PI * 1.5)
+        relXArc(self.centre.x * self.scaling, self.centre.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling, self.drawAngle + PI, self.drawAngle + PI * 1.5)
         fill(255, 255, 14)
-        relXArc(self.centre.x * self.scaling, self.centre.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling, self.angle + 1.5 * PI, self.angle + TWO_PI)
+        relXArc(self.centre.x * self.scaling, self.centre.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling, self.drawAngle + 1.5 * PI, self.drawAngle + TWO_PI)
      
         
 class Car(PhysicalObject):
@@ -296,19 +411,17 @@ class Rope(PhysicalObject):
     '''
     A class that implements a rope (physical string) for spinning things simulation
     '''
+
+    stateAttributes = ()
     
     def __init__(self, objectAttached, centre, scaling):
         self.objectAttached = objectAttached
         self.centre = centre
-        self.updateFromInput()
         self.scaling = scaling
     
     def update(self):
         self.updateFromInput()
     
-    def updateFromInput(self):
-        self.otherEnd = self.objectAttached.position
-    
     def checkForceInwards(self, forceInwards):
         '''
         Checks if the force (assumed to be inwards) is okay for the string to be exerting that force.
@@ -318,36 +431,45 @@ class Rope(PhysicalObject):
         else:
             return 0
             # Strings cannot return an outward force.
+
+    def forceMargin(self, forceInwards):
+        '''
+        Returns a number that goes below zero exactly when the force stops being okay, for finding when it happens.
+        '''
+        return forceInwards
             
     def display(self):
         stroke(0)
         strokeWeight(3)
-        relXLine(self.centre.x * self.scaling, self.centre.y * self.scaling, self.otherEnd.x * self.scaling, self.otherEnd.y * self.scaling)
+        relXLine(self.centre.x * self.scaling, self.centre.y * self.scaling, self.objectAttached.drawPosition.x * self.scaling, self.objectAttached.drawPosition.y * self.scaling)
         strokeWeight(1)
             
 class Wire(PhysicalObject):
+    stateAttributes = ()
+
     def __init__(self, objectAttached, centre, scaling):
         self.objectAttached = objectAttached
         self.centre = centre
-        self.updateFromInput()
         self.scaling = scaling
         
     def update(self):
         self.updateFromInput()
     
-    def updateFromInput(self):
-        self.otherEnd = self.objectAttached.position
-    
     def checkForceInwards(self, forceInwards):
         return True # Wires can exert forces in either direction!
+
+    def forceMargin(self, forceInwards):
+        return 1.0 # So this never goes below zero
     
     def display(self):
         stroke(200, 200, 200)
         strokeWeight(2)
-        relXLine(self.centre.x * self.scaling, self.centre.y * self.scaling, self.otherEnd.x * self.scaling, self.otherEnd.y * self.scaling)
+        relXLine(self.centre.x * self.scaling, self.centre.y * self.scaling, self.objectAttached.drawPosition.x * self.scaling, self.objectAttached.drawPosition.y * self.scaling)
         strokeWeight(1)
 
 class Sphere(PhysicalObject):
+    stateAttributes = ("diameter",)
+
     def __init__(self, radiusP, centre, scaling, strokeColour, fillColour):
         self.radiusP = radiusP
         self.centre = centre
@@ -375,6 +497,9 @@ class InsideSphere(Sphere):
         else:
             return False # If you are inside a sphere, you can only feel a force inwards
 
+    def forceMargin(self, forceInwards):
+        return forceInwards
+
 class OutsideSphere(Sphere):
     def updateFromInput(self):
         # As the mass is outside, the diameter needs to be slightly smaller than twice the radius of the masses orbit
@@ -385,15 +510,22 @@ class OutsideSphere(Sphere):
             return True
         else:
             return False # If you are outside a sphere, you can only feel a force outwards from it.
+
+    def forceMargin(self, forceInwards):
+        return - forceInwards
         
 class CircularMass(PhysicalObject):
     '''
     Implements the masses for the strings and wires simulation.
+    The mass can only move round the circle, so it is simulated by its angle from the bottom (anticlockwise on screen) and its angular velocity.
+    Positions and velocities as Vectors are only worked out when they are needed, eg for drawing.
     '''
+
+    stateAttributes = ("angle", "angularVelocity", "angularAcceleration", "circleRadius", "mass", "moving", "drawPosition")
     
     def __init__(self, radius, position, velocity, scaling, fillColour, massP, radiusP, initialAngleP, initialSpeedP, kineticEnergyP, gravitationalEnergyP, centre):
         self.fillColour = fillColour
-        self.radius = radius
+        self.radius = radius # The size of the mass drawn, not the circle it moves around.
         self.moving = True
         self.centre = centre
         self.massP = massP
@@ -402,54 +534,86 @@ class CircularMass(PhysicalObject):
         self.initialSpeedP = initialSpeedP
         self.kineticEnergyP = kineticEnergyP
         self.gravitationalEnergyP = gravitationalEnergyP
-        self.updateWhenPaused() # Now set mass, position and velocity from parameters
-        PhysicalObject.__init__(self, self.position, self.velocity, None, scaling, radius, radius)
+        self.scaling = scaling
+        self.relWidth = radius
+        self.relHeight = radius
+        self.updateWhenPaused() # Now set mass, angle and angular velocity from parameters
+        self.angularAcceleration = 0.0
+        self.drawPosition = self.position
+    
+    @property
+    def position(self):
+        return self.centre + Vector(self.circleRadius * sin(self.angle), self.circleRadius * cos(self.angle))
+    
+    @property
+    def velocity(self):
+        speed = self.circleRadius * self.angularVelocity
+        return Vector(speed * cos(self.angle), - speed * sin(self.angle))
     
     def display(self):
         stroke(0, 0, 0)
         fill(self.fillColour)
-        relXEllipse(self.position.x * self.scaling, self.position.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling)
+        relXEllipse(self.drawPosition.x * self.scaling, self.drawPosition.y * self.scaling, self.radius * self.scaling, self.radius * self.scaling)
+    
+    def update(self, time):
+        '''
+        Moves the mass round the circle by one tick using its integrator.
+        '''
+        self.updateFromInput()
+        self.angle, self.angularVelocity, self.angularAcceleration = self.integrator.step(self.angle, self.angularVelocity, self.angularAccelerationAt, time)
+        self.updateToOutput()
+    
+    def angularAccelerationAt(self, angle, angularVelocity):
+        '''
+        Only the part of the weight along the circle changes the speed, so this is the equation of a pendulum.
+        '''
+        return - g / self.circleRadius * sin(angle)
         
     def updateFromInput(self):
         self.mass = self.massP.value
-        self.position = self.centre + (self.position - self.centre).scaleAbs(self.radiusP.value)
+        
+        # If the radius changes, keep the same speed rather than the same angular velocity.
+        if self.radiusP.value != self.circleRadius:
+            self.angularVelocity *= self.circleRadius / float(self.radiusP.value)
+            self.circleRadius = self.radiusP.value
         
     def updateToOutput(self):
-        self.kineticEnergyP.setParameter(0.5 * self.mass * abs(self.velocity) ** 2)
-        self.gravitationalEnergyP.setParameter(self.mass * g * (self.centre - self.position).y)
+        self.kineticEnergyP.setParameter(0.5 * self.mass * (self.circleRadius * self.angularVelocity) ** 2)
+        self.gravitationalEnergyP.setParameter(- self.mass * g * self.circleRadius * cos(self.angle)) # Zero at the height of the centre
     
     def updateWhenPaused(self):
         self.mass = self.massP.value # Update mass from parameter
-        
-        # Use trig to find components
-        x = self.radiusP.value * sin(radians(self.initialAngleP.value))
-        y = self.radiusP.value * cos(radians(self.initialAngleP.value))
-        
-        self.position = self.centre + Vector(x, y)
-        self.velocity = Vector(y, -x).scaleAbs(self.initialSpeedP.value)
+        self.circleRadius = self.radiusP.value
+        self.angle = radians(self.initialAngleP.value)
+        self.angularVelocity = self.initialSpeedP.value / float(self.circleRadius)
+
+    def renderState(self):
+        # Interpolate the angle rather than the position, so it stays on the circle in between ticks.
+        return (self.angle, self.circleRadius)
+
+    def showState(self, state):
+        angle, circleRadius = state
+        self.drawPosition = self.centre + Vector(circleRadius * sin(angle), circleRadius * cos(angle))
     
-    def forceInwardsRequired(self):
+    def forceInwardsRequired(self, angle = None, angularVelocity = None):
         '''
         Determines the inward force required from the object to stay in circular motion.
+        By default this uses the current angle and angular velocity, but others can be given (eg part way through a tick).
         '''
+        if angle is None:
+            self.updateFromInput()
+            angle = self.angle
+            angularVelocity = self.angularVelocity
         
-        self.updateFromInput() # Keeps it up to date so as to reduce rounding errors
-        
-        # Calculate the component of the weight inwards
-        weight = self.mass * g
-        fromCentre = (self.centre - self.position)
-        cosAngle = fromCentre.y / abs(fromCentre)
-        weightInwards = weight * cosAngle
-        
-        # Calculate the inwards component required using mv^2/r
-        totalNeeded = self.mass * abs(self.velocity) ** 2 / abs(fromCentre)
-
-        return totalNeeded - weightInwards
+        # The inward force needed is mv^2/r = m r w^2, and the weight pulls outwards by mg cos(angle)
+        return self.mass * (self.circleRadius * angularVelocity ** 2 + g * cos(angle))
         
 class Racetrack(PhysicalObject):
     '''
     Draws a racetrack for the cars on racetracks simulation.
     '''
+
+    stateAttributes = ("radius",)
     
     def __init__(self, radiusP, trackWidth, centre, scaling):
         self.trackWidth = trackWidth
@@ -479,14 +643,19 @@ class Racetrack(PhysicalObject):
             relXArc(self.centre.x * self.scaling, self.centre.y * self.scaling, 2 * self.radius * self.scaling, 2 * self.radius * self.scaling, i * angle, i * angle + angle / 2.0)
     
 class Car(PhysicalObject):
+    stateAttributes = ("angleRoundRacetrack", "slipped", "slipping", "distance", "speed", "mass", "verticalAngle", "mu", "drawAngle", "drawDistance",
+                       "cosAngle", "sinAngle", "weight", "massSpeedSquared", "minimumSpeed", "maximumSpeed")
     
-    def __init__(self, centre, speedP, radiusP, massP, angleP, muP, relWidth, relHeight, fillColour, scaling):
+    def __init__(self, centre, speedP, radiusP, massP, angleP, muP, minimumSpeedP, maximumSpeedP, relWidth, relHeight, fillColour, scaling):
         self.centre = centre
         self.radiusP = radiusP
         self.speedP = speedP
         self.massP = massP
         self.muP = muP
         self.verticalAngleP = angleP
+        self.minimumSpeedP = minimumSpeedP
+        self.maximumSpeedP = maximumSpeedP
+        self.inputParameters = [speedP, radiusP, massP, angleP, muP]
         self.angleRoundRacetrack = 0
         self.scaling = scaling
         
@@ -500,6 +669,8 @@ class Car(PhysicalObject):
         self.slipping = 0 # Direction of slipping
         
         self.updateFromInput()
+        self.drawAngle = self.angleRoundRacetrack
+        self.drawDistance = self.distance
     
     def update(self, time):
         self.updateFromInput()
@@ -509,12 +680,10 @@ class Car(PhysicalObject):
         # Rcos angle = mg - F sin angle
         # Rsin angle  - F cos angle = m v^2/r
         # R = normal reaction, F = friction UP slope
-        c = cos(radians(self.verticalAngle))
-        s = sin(radians(self.verticalAngle))
-        weight = self.mass * g
-        forceNeeded = self.mass * self.speed ** 2 / self.distance
-        reaction = weight * c + forceNeeded * s
-        friction = weight * s - forceNeeded * c
+        # Only the distance changes from tick to tick, so everything else comes from updateFromInput.
+        forceNeeded = self.massSpeedSquared / self.distance
+        reaction = self.weight * self.cosAngle + forceNeeded * self.sinAngle
+        friction = self.weight * self.sinAngle - forceNeeded * self.cosAngle
         
         if friction > reaction * self.mu:
             # Required friction is too large, so it falls down the slope.
@@ -527,33 +696,73 @@ class Car(PhysicalObject):
         omega = self.speed / self.distance # Calculate radial acceleration.
         self.angleRoundRacetrack = (self.angleRoundRacetrack + omega * time) % TWO_PI  
         self.slipped += self.slipping * time 
-        
-        self.updateToOutput()     
     
     def updateFromInput(self):
         # Update all the relevant parameters from the parameters
         self.distance = self.radiusP.value + self.slipped
-        self.speed = self.speedP.value
-        self.mass = self.massP.value
-        self.verticalAngle = self.verticalAngleP.value 
-        self.mu = self.muP.value
+        if self.inputsChanged():
+            self.speed = self.speedP.value
+            self.mass = self.massP.value
+            self.verticalAngle = self.verticalAngleP.value 
+            self.mu = self.muP.value
+            self.updateDerived()
+            self.updateToOutput()
+
+    def updateDerived(self):
+        '''
+        Works out everything that only depends on the parameters: the trig of the slope, the weight, the force needed to go
+        round and the band of speeds the car can go at without slipping.
+        '''
+        radius = self.radiusP.value
+        self.cosAngle = cos(radians(self.verticalAngle))
+        self.sinAngle = sin(radians(self.verticalAngle))
+        self.weight = self.mass * g
+        self.massSpeedSquared = self.mass * self.speed ** 2 # Divided by the distance from the centre, this is the force needed
+
+        # From the equations in update, with the friction at its limit of mu R down the slope (slowest) or up it (fastest):
+        # v^2 = r g (sin - mu cos) / (cos + mu sin) and v^2 = r g (sin + mu cos) / (cos - mu sin)
+        c, s, mu = self.cosAngle, self.sinAngle, self.mu
+        self.minimumSpeed = sqrt(max(radius * g * (s - mu * c) / (c + mu * s), 0.0))
+        if c - mu * s > 0:
+            self.maximumSpeed = sqrt(radius * g * (s + mu * c) / (c - mu * s))
+        else:
+            self.maximumSpeed = float("inf") # Friction can always hold it on, however fast it goes.
+
+    def updateToOutput(self):
+        self.minimumSpeedP.setParameter(self.minimumSpeed)
+        self.maximumSpeedP.setParameter(self.maximumSpeed)
     
     def initialise(self):
         self.angleRoundRacetrack = 0
         self.slipping = 0
         self.slipped = 0
+
+    def renderState(self):
+        return (self.angleRoundRacetrack, self.distance)
+
+    def showState(self, state):
+        self.drawAngle, self.drawDistance = state
+
+    def interpolate(self, previous, current, alpha):
+        # The angle wraps round at 2 pi, so unwrap it to go the short way round.
+        previousAngle = previous[0]
+        if current[0] - previousAngle < -PI:
+            previousAngle -= TWO_PI
+        PhysicalObject.interpolate(self, (previousAngle, previous[1]), current, alpha)
     
     def display(self):
         noStroke()
         fill(self.fillColour)
         # Rotate the whole coordinates by this angle
-        relXRotateAbout(self.centre.x * self.scaling, self.centre.y * self.scaling, self.angleRoundRacetrack)
+        relXRotateAbout(self.centre.x * self.scaling, self.centre.y * self.scaling, self.drawAngle)
         # Always draw the rectangle at the bottom
-        relXRect((self.centre.x - 0.5 * self.relWidth) * self.scaling, (self.centre.y + self.distance - 0.5 * self.relHeight) * self.scaling, self.relWidth * self.scaling, self.relHeight * self.scaling, 5)
+        relXRect((self.centre.x - 0.5 * self.relWidth) * self.scaling, (self.centre.y + self.drawDistance - 0.5 * self.relHeight) * self.scaling, self.relWidth * self.scaling, self.relHeight * self.scaling, 5)
         # Then rotate back, so everything else is drawn correctly
-        relXRotateAbout(self.centre.x * self.scaling, self.centre.y * self.scaling, - self.angleRoundRacetrack)
+        relXRotateAbout(self.centre.x * self.scaling, self.centre.y * self.scaling, - self.drawAngle)
 
 class BreakDownMessage(PhysicalObject):
+    stateAttributes = ("displayText",)
+
     def __init__(self, displayText, relX, relY, relWidth, relHeight, fontSize, textColour = color(255, 0, 0)):
         self.displayText = displayText
         self.relX = relX
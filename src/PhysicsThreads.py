@@ -0,0 +1,154 @@
+# TODO:
+
+# Runs a model's ticks on their own thread, so a slow frame doesn't slow the physics down and the physics doesn't use up frame time.
+# Under Processing (Jython) threads really do run at the same time on different cores.
+
+import threading
+import time
+from SimulationModels import showStates
+
+class Frame(object):
+    '''
+    Everything needed to draw one moment of a simulation. Frames are never changed once published, so the drawing thread can
+    read one while the physics thread carries on.
+    '''
+
+    __slots__ = ("previousStates", "currentStates", "accumulator", "timeStep", "clock", "interpolating", "realTime")
+
+    def __init__(self, previousStates, currentStates, accumulator, timeStep, clock, interpolating, realTime):
+        self.previousStates = previousStates
+        self.currentStates = currentStates
+        self.accumulator = accumulator # Time waiting to be simulated when the frame was published
+        self.timeStep = timeStep
+        self.clock = clock # When it was published
+        self.interpolating = interpolating
+        self.realTime = realTime # Whether the physics is keeping up with the clock, rather than going a fixed amount per frame
+
+class PhysicsThread(threading.Thread):
+    '''
+    Steps a model on its own thread and publishes a Frame after every batch of ticks.
+    The screen sets playing, paused and timeMode, and anything else that changes the model (eg resetting it) has to hold lock.
+    Drawing only ever reads the latest published frame, so it never waits for the physics.
+    '''
+
+    def __init__(self, model, lock, interval = 0.002):
+        '''
+        Sets up the thread for a model, sharing lock with the screen. The thread sleeps for interval seconds between batches of ticks.
+        '''
+        threading.Thread.__init__(self)
+        self.daemon = True # Don't keep Processing open after the window is closed.
+        self.model = model
+        self.lock = lock
+        self.interval = interval
+        self.yieldInterval = 0.001 # Longest the screen should have to wait for the lock while fast forwarding
+
+        # Set by the screen each frame
+        self.playing = False
+        self.paused = False
+        self.timeMode = "REALTIME"
+        self.fastForwardBudget = 0.025
+        self.requestedTime = 0.0 # Simulated time asked for by the screen in the time modes that go a fixed amount per frame
+
+        # Set by this thread
+        self.brokeDown = False # The screen clears this once it has dealt with the break down.
+        self.simulatedTime = 0.0 # Total simulated time, only ever added to, for the screen to work out how fast it is going.
+        self.running = True
+
+        # Two frames, so one can be filled while the other is being read. front is the one to read.
+        self.frames = [None, None]
+        self.front = 0
+        self.publish(False)
+
+    def publish(self, interpolating):
+        '''
+        Fills the back frame from the model and then swaps it to the front.
+        '''
+        back = 1 - self.front
+        self.frames[back] = Frame(tuple(self.model.previousStates), tuple(self.model.renderStates()), self.model.accumulator,
+                                  self.model.timeStep, time.time(), interpolating, self.timeMode == "REALTIME")
+        self.front = back
+
+    def latestFrame(self):
+        return self.frames[self.front]
+
+    def requestTime(self, deltaTime):
+        # Called by the screen, so it needs the lock as both threads change requestedTime.
+        with self.lock:
+            self.requestedTime += deltaTime
+
+    def run(self):
+        lastClock = time.time()
+        while self.running:
+            now = time.time()
+            elapsed = now - lastClock
+            lastClock = now
+
+            if self.timeMode == "FASTFORWARD" and self.isPlaying():
+                self.fastForward()
+
+            with self.lock:
+                playing = self.isPlaying()
+                if playing and self.timeMode != "FASTFORWARD":
+                    startTime = self.model.time
+                    if self.timeMode == "REALTIME":
+                        carryOn = self.model.advance(elapsed)
+                    else:
+                        carryOn = self.model.advance(self.requestedTime)
+                        self.requestedTime = 0.0
+                    self.simulatedTime += self.model.time - startTime
+                    if not carryOn:
+                        self.brokeDown = True
+                elif not playing and not self.paused and not self.brokeDown:
+                    self.model.updateStoppedIfChanged()
+                self.publish(playing and self.timeMode != "FASTFORWARD")
+
+            time.sleep(self.interval)
+
+    def isPlaying(self):
+        return self.playing and not self.paused and not self.brokeDown
+
+    def fastForward(self):
+        '''
+        Takes as many ticks as fit in fastForwardBudget seconds, letting go of the lock after every tick, so the screen never
+        has to wait for a whole batch of ticks to change something.
+        '''
+        endClock = time.time() + self.fastForwardBudget
+        yieldClock = time.time() + self.yieldInterval
+        while True:
+            with self.lock:
+                if not self.isPlaying():
+                    return # Stopped (or reset) by the screen part way through
+                self.model.accumulator = 0.0 # Nothing is drawn in between ticks when fast forwarding
+                startTime = self.model.time
+                carryOn = self.model.step(self.model.timeStep)
+                self.simulatedTime += self.model.time - startTime
+                if not carryOn:
+                    self.brokeDown = True
+                    return
+            now = time.time()
+            if now >= endClock:
+                return
+            if now >= yieldClock:
+                # Letting go of the lock isn't enough on its own, as this thread can take it straight back before the
+                # screen's thread gets to run, so every so often let the other threads run.
+                time.sleep(0)
+                yieldClock = now + self.yieldInterval
+
+    def stop(self):
+        '''
+        Stops the thread and waits for it to finish its last batch of ticks.
+        '''
+        self.running = False
+        if self.is_alive():
+            self.join()
+
+def showFrame(objectArray, frame):
+    '''
+    Sets where every object will be drawn from a published frame. In real time, the time since it was published is added on,
+    so drawing stays smooth even though frames arrive at their own pace.
+    '''
+    waiting = frame.accumulator
+    if frame.realTime:
+        waiting += time.time() - frame.clock
+    alpha = min(max(waiting / frame.timeStep, 0.0), 1.0)
+    showStates(objectArray, frame.previousStates, frame.currentStates, alpha, frame.interpolating)
@@ -0,0 +1,136 @@
+# These functions stand in for the Processing Python Mode builtins, so the rest of src can be imported under plain CPython
+# (eg for profiling or running models headless). Import this module before any of the others.
+# Inside Processing the real builtins already exist, so importing this does nothing.
+
+import math
+import os
+import sys
+import time
+
+try:
+    import __builtin__ as builtins # Python 2 / Jython
+except ImportError:
+    import builtins
+
+# Allow the modules in src to import each other the same way they do in Processing, eg "from Vectors import Vector".
+sourceDirectory = os.path.dirname(os.path.abspath(__file__))
+if sourceDirectory not in sys.path:
+    sys.path.insert(0, sourceDirectory)
+
+# Every drawing call is added to this list while recording is switched on, as a tuple of (name, arguments).
+calls = []
+recording = False
+startTime = time.time()
+
+def startRecording():
+    '''
+    Clears any earlier calls and starts recording drawing calls.
+    '''
+    global recording
+    del calls[:]
+    recording = True
+
+def stopRecording():
+    '''
+    Stops recording drawing calls and returns the ones made.
+    '''
+    global recording
+    recording = False
+    return list(calls)
+
+def drawingFunction(name):
+    '''
+    Makes a stand in for a Processing drawing function, which does nothing except being recorded.
+    '''
+    def function(*args):
+        if recording:
+            calls.append((name, args))
+    function.__name__ = name
+    return function
+
+def color(*args):
+    '''
+    Packs the components into a 32 bit ARGB integer like Processing does.
+    A single value is grey, and an optional last value is the alpha.
+    '''
+    if len(args) in (1, 2):
+        r = g = b = args[0]
+    else:
+        r, g, b = args[:3]
+    if len(args) in (2, 4):
+        a = args[-1]
+    else:
+        a = 255
+    return (int(a) & 255) << 24 | (int(r) & 255) << 16 | (int(g) & 255) << 8 | (int(b) & 255)
+
+def millis():
+    return int((time.time() - startTime) * 1000)
+
+def size(newWidth, newHeight, *args):
+    builtins.width = newWidth
+    builtins.height = newHeight
+
+def loadImage(fileName):
+    # Images are never drawn, so just remember which file was asked for.
+    return fileName
+
+def saveStrings(fileName, lines):
+    with open(fileName, "w") as outputFile:
+        outputFile.write("\n".join(lines) + "\n")
+
+def loadStrings(fileName):
+    with open(fileName) as inputFile:
+        return inputFile.read().splitlines()
+
+def exit():
+    sys.exit()
+
+stubs = {
+    "color": color,
+    "millis": millis,
+    "size": size,
+    "loadImage": loadImage,
+    "saveStrings": saveStrings,
+    "loadStrings": loadStrings,
+    "exit": exit,
+
+    # Maths functions and constants
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "sqrt": math.sqrt,
+    "radians": math.radians,
+    "degrees": math.degrees,
+    "PI": math.pi,
+    "HALF_PI": math.pi / 2,
+    "TWO_PI": 2 * math.pi,
+
+    # Alignment constants, with the same values as Processing
+    "LEFT": 37,
+    "UP": 38,
+    "RIGHT": 39,
+    "DOWN": 40,
+    "CENTER": 3,
+
+    # The screen, mouse and keyboard start as if nothing had happened yet
+    "width": 1900,
+    "height": 950,
+    "mouseX": 0,
+    "mouseY": 0,
+    "mousePressed": False,
+    "key": "",
+}
+
+for name in ["rect", "ellipse", "arc", "line", "point", "triangle", "text", "textSize", "textAlign", "image",
+             "fill", "noFill", "stroke", "noStroke", "strokeWeight", "translate", "rotate", "background"]:
+    stubs[name] = drawingFunction(name)
+
+def install():
+    '''
+    Adds any missing Processing builtins, leaving the real ones alone if running inside Processing.
+    '''
+    for name in stubs:
+        if not hasattr(builtins, name):
+            setattr(builtins, name, stubs[name])
+
+install()
@@ -0,0 +1,153 @@
+# TODO:
+
+# Recordings are a short header followed by one fixed size record per tick, so any frame can be found straight away from its
+# number without reading the rest of the file. Each record is the time, then every number in the objects' render states, then
+# the value of every output parameter, all as little endian doubles.
+
+import os
+import struct
+
+try:
+    import mmap
+except ImportError:
+    mmap = None # Jython doesn't have mmap, so frames are read with seek instead.
+
+MAGIC = b"SREC"
+headerStart = struct.Struct("<4sI") # The magic bytes and the length of the header text
+
+class Recorder(object):
+    '''
+    Appends the state of a model to a recording file after every tick, without keeping anything in memory.
+    Attach one to a model with model.recorder = Recorder(model, fileName), and close it when finished.
+    '''
+
+    def __init__(self, model, fileName):
+        '''
+        Starts a new recording of the model, taking the layout of every record from its current objects and output parameters.
+        '''
+        self.fileName = fileName
+        self.stateLengths = [0 if state is None else len(state) for state in model.renderStates()]
+        self.outputNames = [parameter.name for parameter in model.outputParameterArray]
+        self.record = struct.Struct("<" + str(1 + sum(self.stateLengths) + len(self.outputNames)) + "d")
+        self.frames = 0
+
+        header = "\n".join([type(model).__name__, ",".join(str(length) for length in self.stateLengths), "\t".join(self.outputNames)]).encode("utf-8")
+        self.file = open(fileName, "wb")
+        self.file.write(headerStart.pack(MAGIC, len(header)))
+        self.file.write(header)
+
+    def write(self, model):
+        '''
+        Adds the current state of the model to the end of the recording.
+        '''
+        values = [model.time]
+        for state, length in zip(model.renderStates(), self.stateLengths):
+            if (0 if state is None else len(state)) != length:
+                raise ValueError("The objects changed during the recording, so start a new one.")
+            if length:
+                values.extend(state)
+        values.extend(parameter.value for parameter in model.outputParameterArray)
+        self.file.write(self.record.pack(*values))
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+class Playback(object):
+    '''
+    Reads frames back from a recording in any order. The file is memory mapped where possible, so finding a frame costs the same
+    however long the recording is, and only the frames actually looked at are read from the disk.
+    Only frames recorded before the playback was opened can be read.
+    '''
+
+    def __init__(self, fileName):
+        self.file = open(fileName, "rb")
+        magic, headerLength = headerStart.unpack(self.file.read(headerStart.size))
+        if magic != MAGIC:
+            self.file.close()
+            raise ValueError(fileName + " is not a simulation recording.")
+
+        modelName, stateLengths, outputNames = self.file.read(headerLength).decode("utf-8").split("\n")
+        self.modelName = modelName
+        self.stateLengths = [int(length) for length in stateLengths.split(",") if length]
+        self.outputNames = [name for name in outputNames.split("\t") if name]
+        self.record = struct.Struct("<" + str(1 + sum(self.stateLengths) + len(self.outputNames)) + "d")
+        self.dataStart = headerStart.size + headerLength
+
+        self.data = None
+        if mmap is not None and os.path.getsize(fileName) > self.dataStart:
+            self.data = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    def __len__(self):
+        if self.data is not None:
+            size = len(self.data)
+        else:
+            size = os.fstat(self.file.fileno()).st_size
+        return (size - self.dataStart) // self.record.size
+
+    def values(self, index):
+        '''
+        Returns all the numbers in a frame, straight from the file.
+        '''
+        frames = len(self)
+        if index < 0:
+            index += frames
+        if not 0 <= index < frames:
+            raise IndexError("There is no frame " + str(index) + " in the recording.")
+
+        offset = self.dataStart + index * self.record.size
+        if self.data is not None:
+            return self.record.unpack_from(self.data, offset)
+        self.file.seek(offset)
+        return self.record.unpack(self.file.read(self.record.size))
+
+    def __getitem__(self, index):
+        '''
+        Returns the time, the render state of every object (None for ones that don't move) and a dictionary of the output
+        parameters for a frame.
+        '''
+        values = self.values(index)
+        states = []
+        position = 1
+        for length in self.stateLengths:
+            states.append(tuple(values[position:position + length]) if length else None)
+            position += length
+        return values[0], states, dict(zip(self.outputNames, values[position:]))
+
+    def timeOf(self, index):
+        return self.values(index)[0]
+
+    def frameAt(self, time):
+        '''
+        Returns the number of the last frame at or before time (or the first frame if time is before the recording).
+        Frames can be different lengths (eg when a tick was cut short by the simulation breaking down), so this is a binary search.
+        '''
+        low, high = 0, len(self) - 1
+        if high < 0 or time < self.timeOf(0):
+            return 0
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.timeOf(middle) <= time:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def show(self, model, index):
+        '''
+        Puts a frame into a model of the same type, so drawing it shows the recording instead of the simulation.
+        Returns the time of the frame.
+        '''
+        time, states, outputs = self[index]
+        for object, state in zip(model.objectArray, states):
+            if state is not None:
+                object.showState(state)
+        for parameter in model.outputParameterArray:
+            if parameter.name in outputs:
+                parameter.setParameter(outputs[parameter.name])
+        return time
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.file.close()
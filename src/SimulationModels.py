@@ -0,0 +1,584 @@
+# TODO:
+
+from Parameters import Parameter
+from PhysicalObjects import *
+from Integrators import *
+from Events import Event, findRoot
+from collections import deque
+import copy
+
+g = 9.8
+
+def showStates(objectArray, previousStates, currentStates, alpha, interpolating = True):
+    '''
+    Sets where every object will be drawn from two lists of render states, alpha of the way (from 0 to 1) from the previous
+    states to the current ones, or exactly at the current ones if not interpolating.
+    '''
+    for object, previous, current in zip(objectArray, previousStates, currentStates):
+        if current is None:
+            continue
+        if interpolating and previous is not None and len(previous) == len(current):
+            object.interpolate(previous, current, alpha)
+        else:
+            object.showState(current)
+
+class SimulationModel(object):
+    '''
+    Implements a base class for the headless part of every simulation.
+    A model owns the parameters and physical objects and moves them on in time, but never draws anything or reads the clock,
+    so it can be stepped as fast as needed without a Processing window.
+    '''
+
+    stateAttributes = ("time", "breakDownText") # Attributes of the model itself that change as it runs
+
+    def __init__(self, parameterArray, objectArray, outputParameterArray):
+        '''
+        Sets up a model from its input parameters, physical objects and the output parameters it keeps up to date for graphs.
+        Inheriting models should call updateStopped once everything is set up, so the objects start in line with the parameters,
+        and then save initialSnapshot for reset to go back to.
+        '''
+        self.parameterArray = parameterArray
+        self.objectArray = objectArray
+        self.outputParameterArray = outputParameterArray
+        self.time = 0.0
+        self.breakDownText = "" # Explains why the simulation broke down, if it has.
+        self.events = [] # Everything that has happened so far, in order.
+        self.recorder = None # A Recorder to write every tick to, if the run is being recorded.
+
+        # Whether updateStopped needs running again, because a parameter has changed or the model has moved since it last ran.
+        self.stale = True
+        for parameter in parameterArray:
+            parameter.subscribe(self.parameterChanged)
+
+        # Physics always moves in ticks of exactly timeStep, however long each frame takes.
+        self.timeStep = 0.01
+        self.maxSteps = 10 # Most ticks taken in one frame, so a slow frame can't make the next one even slower.
+        self.accumulator = 0.0 # Time waiting to be simulated
+        self.previousStates = [None for object in objectArray] # Render states from before the last tick, for drawing in between ticks.
+
+        # Snapshots from every historyInterval seconds of the run, for rewinding (a minute's worth by default).
+        # Taking a snapshot costs about as much as a tick, so they are kept well apart.
+        self.historyInterval = 1.0
+        self.history = deque(maxlen = 60)
+
+    def step(self, deltaTime):
+        '''
+        Moves the simulation on by one tick of deltaTime seconds.
+        Returns False if the simulation broke down during the tick, and True otherwise.
+        If it had already broken down, nothing happens and it returns False straight away.
+        '''
+        if self.finished():
+            return False
+        self.stale = True
+        if not self.history or self.time >= self.history[-1]["model"]["time"] + self.historyInterval * (1 - 1e-6):
+            self.history.append(self.snapshot())
+
+        self.time += deltaTime
+        carryOn = self.updatePlaying(deltaTime)
+        if self.recorder is not None:
+            self.recorder.write(self)
+        return carryOn
+
+    def advance(self, frameTime):
+        '''
+        Moves the simulation on by frameTime seconds in as many ticks of timeStep as fit, carrying any leftover time to the next call.
+        Time beyond maxSteps ticks is dropped. Returns False if the simulation broke down, and True otherwise.
+        '''
+        self.accumulator = min(self.accumulator + frameTime, self.maxSteps * self.timeStep)
+
+        # Allow for rounding errors, so eg 0.03 is always exactly three ticks of 0.01
+        while self.accumulator >= self.timeStep * (1 - 1e-6):
+            self.accumulator -= self.timeStep
+            if self.accumulator < self.timeStep * (1 - 1e-6):
+                # This is the last tick this frame, so remember where things were for drawing.
+                self.previousStates = self.renderStates()
+            if not self.step(self.timeStep):
+                self.accumulator = 0.0
+                return False
+        return True
+
+    def fastForward(self, budget, clock):
+        '''
+        Takes as many ticks of timeStep as fit in budget seconds, timed with clock (a function returning the time in seconds),
+        so the model still never reads the clock itself. Always takes at least one tick.
+        Returns the simulated time covered, and False if the simulation broke down (True otherwise).
+        '''
+        startTime = self.time
+        endClock = clock() + budget
+        self.accumulator = 0.0 # Nothing is drawn in between ticks when fast forwarding
+        while True:
+            if not self.step(self.timeStep):
+                return self.time - startTime, False
+            if clock() >= endClock:
+                return self.time - startTime, True
+
+    def renderStates(self):
+        '''
+        Returns a list of what every object needs to be drawn (None for objects that don't move).
+        '''
+        return [object.renderState() for object in self.objectArray]
+
+    def updateDrawing(self, interpolating = True):
+        '''
+        Sets where every object will be drawn. When interpolating, objects are drawn part of the way between the last two ticks,
+        depending on how much time is waiting in the accumulator, so drawing runs smoothly whatever the tick length. Otherwise
+        they are drawn exactly where they are.
+        '''
+        alpha = min(max(self.accumulator / self.timeStep, 0.0), 1.0)
+        showStates(self.objectArray, self.previousStates, self.renderStates(), alpha, interpolating)
+
+    def setIntegrator(self, integrator):
+        '''
+        Chooses the integrator the moving objects use for each tick, eg RungeKutta4().
+        '''
+        self.integrator = integrator
+        for object in self.objectArray:
+            object.integrator = integrator
+
+    def run(self, duration, deltaTime):
+        '''
+        Steps the simulation for duration seconds in ticks of deltaTime, stopping early if it breaks down.
+        Returns the number of ticks taken.
+        '''
+        steps = 0
+        for tick in range(int(round(duration / deltaTime))):
+            steps += 1
+            if not self.step(deltaTime):
+                break
+        return steps
+
+    def updatePlaying(self, deltaTime):
+        '''
+        Updates the objects by one tick while the simulation is playing.
+        The function will actually do things for specific simulations.
+        '''
+        return True
+
+    def updateStopped(self):
+        '''
+        Keeps the objects in line with the parameters while the simulation is not playing.
+        The function will actually do things for specific simulations.
+        '''
+        pass
+
+    def finished(self):
+        '''
+        Returns True if the simulation has already broken down and can't go any further (eg it is started again without being
+        reset), so step doesn't move time on or record the break down again.
+        The function will actually do things for specific simulations.
+        '''
+        return False
+
+    def parameterChanged(self, parameter):
+        self.stale = True
+
+    def updateStoppedIfChanged(self):
+        '''
+        Runs updateStopped only if something has changed since it last ran, so most frames while stopped do nothing.
+        '''
+        if self.stale:
+            self.stale = False
+            self.updateStopped()
+            self.forgetTicks()
+
+    def forgetTicks(self):
+        '''
+        Forgets the time waiting in the accumulator and where things were before the last tick, for when the objects have
+        jumped (eg the parameters changed or a snapshot was restored), so they aren't drawn part of the way from where they were.
+        '''
+        self.accumulator = 0.0
+        self.previousStates = [None for object in self.objectArray]
+
+    def snapshot(self):
+        '''
+        Returns a copy of everything about the model that changes as it runs: the parameters, every object's state, the
+        integrator (which can remember things between ticks) and the model's own time and events.
+        restore puts it all back exactly, so carrying on from a snapshot gives exactly the same results as the first time.
+        '''
+        return {"model": dict((name, copyValue(getattr(self, name))) for name in self.stateAttributes),
+                "parameters": [parameter.value for parameter in self.parameterArray + self.outputParameterArray],
+                "objects": [object.getState() for object in self.objectArray],
+                "integrator": copy.copy(getattr(self, "integrator", None)),
+                "events": list(self.events)}
+
+    def restore(self, snapshot):
+        '''
+        Puts the model back into the state from a snapshot. The snapshot isn't changed, so it can be restored again later.
+        '''
+        for name in self.stateAttributes:
+            setattr(self, name, copyValue(snapshot["model"][name]))
+        for parameter, value in zip(self.parameterArray + self.outputParameterArray, snapshot["parameters"]):
+            parameter.setParameter(value)
+        for object, state in zip(self.objectArray, snapshot["objects"]):
+            object.setState(state)
+        if snapshot["integrator"] is not None:
+            self.setIntegrator(copy.copy(snapshot["integrator"]))
+        self.events = list(snapshot["events"])
+        self.forgetTicks()
+        self.stale = True
+
+    def rewind(self, seconds):
+        '''
+        Goes back to the last snapshot in the history from at least seconds before the current time (or the start, if the
+        history doesn't go back that far). Returns the time it went back to.
+        '''
+        target = self.time - seconds
+        while self.history and self.history[-1]["model"]["time"] > target + self.timeStep * 1e-6:
+            self.history.pop()
+        self.restore(self.history[-1] if self.history else self.initialSnapshot)
+        self.stopRecording()
+        return self.time
+
+    def stopRecording(self):
+        '''
+        Closes the recording, if there is one. Used when time jumps, as recordings have to go forwards in time.
+        '''
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def reset(self):
+        '''
+        Returns the parameters and objects to their original state.
+        '''
+        self.restore(self.initialSnapshot)
+        self.history.clear()
+        self.stopRecording()
+
+class CoinOnRoundaboutModel(SimulationModel):
+    '''
+    The model for the first simulation: Horizontal circles, coins on roundabouts.
+    '''
+
+    def __init__(self):
+        self.omegaP = Parameter("omega", 1.0, [])
+        self.massP = Parameter("mass", 5.0, [])
+        self.muP = Parameter("mu", 0.5, [])
+        self.radiusP = Parameter("radius", 0.5, [])
+
+        self.positionXP = Parameter("X position", 0, [])
+        self.positionYP = Parameter("Y position", 0, [])
+
+        self.scaling = 0.15
+        centre = Vector(1.4, 1.0)
+
+        self.coin = Coin(1, Vector(0, 0), Vector(0, -2), self.scaling, 0.2, 0.2, yellow, self.massP, self.radiusP, self.muP, self.omegaP, self.positionXP, self.positionYP, centre)
+        self.roundabout = Roundabout(self.omegaP, centre, 2.0, self.scaling)
+
+        parameterArray = [self.massP, self.omegaP, self.muP, self.radiusP]
+        objectArray = [self.roundabout, self.coin]
+        SimulationModel.__init__(self, parameterArray, objectArray, [self.positionXP, self.positionYP])
+        self.updateStopped()
+        self.initialSnapshot = self.snapshot()
+
+    def finished(self):
+        return abs(self.coin.centre - self.coin.position) > 1.2 # It has already left the screen.
+
+    def updatePlaying(self, deltaTime):
+        wasOnRoundabout = self.coin.onRoundabout
+        startPosition = self.coin.position.copy()
+        startTime = self.time - deltaTime
+
+        self.coin.update(self.coin.findForce(), deltaTime)
+        self.roundabout.update(deltaTime)
+
+        # Slipping only depends on the parameters, so it happens at the start of the tick where they first allow it.
+        if wasOnRoundabout and not self.coin.onRoundabout:
+            self.events.append(Event("slip", startTime, self.coin.velocity.copy()))
+
+        # Stop once the coin has left the screen, finding exactly when it crossed the edge.
+        endPosition = self.coin.position
+        if abs(self.coin.centre - endPosition) > 1.2:
+            overEdge = lambda t: abs(startPosition + (endPosition - startPosition) * (t / deltaTime) - self.coin.centre) - 1.2
+            exitTime = findRoot(overEdge, 0.0, deltaTime)
+            self.events.append(Event("exit", startTime + exitTime, startPosition + (endPosition - startPosition) * (exitTime / deltaTime)))
+            return False
+        return True
+
+    def updateStopped(self):
+        self.coin.updateFromInput()
+
+class CarOnRacetrackModel(SimulationModel):
+    '''
+    The model for the second simulation: Horizontal circles, car on a banked racetrack.
+    '''
+
+    def __init__(self):
+        self.angleP = Parameter("angle", 30.0, [])
+        self.massP = Parameter("mass", 1000.0, [])
+        self.radiusP = Parameter("radius", 10.0, [])
+        self.muP = Parameter("mu", 0.5, [])
+        self.speedP = Parameter("speed", 10.0, [])
+
+        self.minimumSpeedP = Parameter("Minimum safe speed", 0, [])
+        self.maximumSpeedP = Parameter("Maximum safe speed", 0, [])
+
+        self.scaling = 0.006
+        self.centre = Vector(25.0, 25.0)
+        self.racetrack = Racetrack(self.radiusP, 4, self.centre, self.scaling)
+        self.car = Car(self.centre, self.speedP, self.radiusP, self.massP, self.angleP, self.muP, self.minimumSpeedP, self.maximumSpeedP,
+                       3.0, 2.0, color(50, 100, 255), self.scaling) # Blue car
+
+        parameterArray = [self.angleP, self.massP, self.radiusP, self.muP, self.speedP]
+        objectArray = [self.racetrack, self.car]
+        SimulationModel.__init__(self, parameterArray, objectArray, [self.minimumSpeedP, self.maximumSpeedP])
+        self.updateStopped()
+        self.initialSnapshot = self.snapshot()
+
+    def finished(self):
+        return abs(self.car.slipped) > 2.0 # It has already slipped too far.
+
+    def updatePlaying(self, deltaTime):
+        wasSlipping = self.car.slipping
+        startSlipped = self.car.slipped
+        startTime = self.time - deltaTime
+
+        self.racetrack.updateFromInput()
+        self.car.update(deltaTime)
+        if self.car.slipping > 0:
+            self.breakDownText = "The car flew off."
+        elif self.car.slipping < 0:
+            self.breakDownText = "The car fell in."
+
+        # Slipping only depends on the parameters, so it starts at the start of the tick where they first allow it.
+        if self.car.slipping and not wasSlipping:
+            self.events.append(Event("slip", startTime, self.car.slipping))
+
+        # Stop the simulation when the car has slipped too much, finding exactly when it got too far.
+        if abs(self.car.slipped) > 2.0:
+            tooFar = lambda t: abs(startSlipped + (self.car.slipped - startSlipped) * (t / deltaTime)) - 2.0
+            self.events.append(Event("slipped too far", startTime + findRoot(tooFar, 0.0, deltaTime), self.car.slipped))
+            return False
+        return True
+
+    def updateStopped(self):
+        self.racetrack.updateFromInput()
+        self.car.updateFromInput()
+
+class VerticalRotationModel(SimulationModel):
+    '''
+    The model for the third simulation: Vertical circles
+    '''
+
+    stateAttributes = SimulationModel.stateAttributes + ("mode", "brokeDown")
+
+    def __init__(self):
+        self.radiusP = Parameter("radius", 1.5, [])
+        self.massP = Parameter("mass", 5.0, [])
+        self.initialAngleP = Parameter("angle", 45.0, [])
+        self.initialSpeedP = Parameter("speed", 0.0, [])
+
+        self.gravitationalEnergyP = Parameter("Gravitational Potential Energy", 0, [])
+        self.kineticEnergyP = Parameter("Kinetic Energy", 0, [])
+
+        self.scaling = 0.06
+        self.centre = Vector(2.6, 2.4)
+        self.mass = CircularMass(0.1, Vector(0, 0), Vector(0, 0), self.scaling, color(0, 0, 0), self.massP, self.radiusP, self.initialAngleP, self.initialSpeedP,
+                                 self.kineticEnergyP, self.gravitationalEnergyP, self.centre)
+
+        parameterArray = [self.radiusP, self.massP, self.initialAngleP, self.initialSpeedP]
+        objectArray = [None, self.mass] # None place holds for the circle thing
+        SimulationModel.__init__(self, parameterArray, objectArray, [self.gravitationalEnergyP, self.kineticEnergyP])
+
+        self.setMode("String")
+
+        # Long ticks, split up by the adaptive integrator wherever the motion needs it (eg near the top of the circle).
+        self.timeStep = 0.05
+        self.setIntegrator(AdaptiveRungeKutta45(1e-7))
+        self.updateStopped()
+        self.initialSnapshot = self.snapshot()
+
+    def setMode(self, mode):
+        '''
+        Changes what the mass is attached to: "String", "Wire", "Outside Sphere" or "Inside Sphere".
+        '''
+        self.mode = mode
+        if mode == "String":
+            self.circleThing = Rope(self.mass, self.centre, self.scaling)
+        elif mode == "Wire":
+            self.circleThing = Wire(self.mass, self.centre, self.scaling)
+        elif mode == "Outside Sphere":
+            self.circleThing = OutsideSphere(self.radiusP, self.centre, self.scaling, color(154, 10, 207), color(218, 124, 252, 20))
+        elif mode == "Inside Sphere":
+            self.circleThing = InsideSphere(self.radiusP, self.centre, self.scaling, color(154, 10, 207), color(218, 124, 252, 20))
+        self.objectArray[0] = self.circleThing # Swap it into the object list.
+        self.stale = True
+
+    def finished(self):
+        return self.brokeDown # The mass stays where it broke down until the parameters change or it is reset.
+
+    def updatePlaying(self, deltaTime):
+        forceRequired = self.mass.forceInwardsRequired()
+        if not self.circleThing.checkForceInwards(forceRequired):
+            # It can't even start this tick.
+            self.breakDown(self.time - deltaTime)
+            return False
+
+        startAngle = self.mass.angle
+        startAngularVelocity = self.mass.angularVelocity
+        integrator = copy.copy(self.mass.integrator) # As it was at the start of the tick, in case it needs to be rerun
+        self.mass.update(deltaTime)
+        self.circleThing.updateFromInput()
+
+        endMargin = self.circleThing.forceMargin(self.mass.forceInwardsRequired())
+        if endMargin < 0:
+            # It broke down during the tick, so rerun the tick to find exactly when.
+            def stateAfter(t):
+                angle, angularVelocity, angularAcceleration = copy.copy(integrator).step(startAngle, startAngularVelocity, self.mass.angularAccelerationAt, t)
+                return angle, angularVelocity
+
+            def marginAfter(t):
+                return self.circleThing.forceMargin(self.mass.forceInwardsRequired(*stateAfter(t)))
+
+            eventTime = findRoot(marginAfter, 0.0, deltaTime, self.circleThing.forceMargin(forceRequired), endMargin)
+            self.mass.angle, self.mass.angularVelocity = stateAfter(eventTime)
+            self.mass.updateToOutput()
+            self.time += eventTime - deltaTime
+            self.breakDown(self.time)
+            return False
+
+        return True
+
+    def restore(self, snapshot):
+        # Put back what the mass was attached to first, so its state goes into the right object.
+        if snapshot["model"]["mode"] != self.mode:
+            self.setMode(snapshot["model"]["mode"])
+        SimulationModel.restore(self, snapshot)
+
+    def breakDown(self, time):
+        '''
+        Records where the mass was when it stopped going round the circle, and chooses the appropriate error message.
+        '''
+        self.brokeDown = True
+        angle = round(degrees(self.mass.angle) % 360, 1)
+        self.events.append(Event("break down", time, angle))
+        if self.mode == "String":
+            self.breakDownText = "The string became slack at " + str(angle) + " degrees."
+        elif self.mode == "Outside Sphere":
+            self.breakDownText = "The mass fell off the sphere at " + str(angle) + " degrees."
+        elif self.mode == "Inside Sphere":
+            self.breakDownText = "The mass fell inside the sphere at " + str(angle) + " degrees."
+
+    def updateStopped(self):
+        self.breakDownText = ""
+        self.brokeDown = False
+        self.mass.updateWhenPaused()
+        self.circleThing.updateFromInput()
+
+class SimpleHarmonicSpringsModel(SimulationModel):
+    '''
+    The model for the fourth simulation: Simple Harmonic Motion, Energy in a spring.
+    '''
+
+    stateAttributes = SimulationModel.stateAttributes + ("analytic", "solution", "solutionInputs")
+
+    def __init__(self):
+        # Input parameters
+        self.numberOfMassesP = Parameter("masses", 1, [])
+        self.stiffnessP = Parameter("stiffness", 50.0, [])
+        self.naturalLengthP = Parameter("naturallength", 1.0, [])
+        self.originalDisplacementP = Parameter("displacment", 0.0, [])
+
+        # Output parameters
+        self.tensionP = Parameter("Tension", 0, [])
+        self.elasticEnergyP = Parameter("Elastic Energy", 0, [])
+        self.kineticEnergyP = Parameter("Kinetic Energy", 0, [])
+        self.displacementP = Parameter("Displacement", 0, [])
+        self.velocityP = Parameter("Velocity", 0, [])
+        self.accelerationP = Parameter("Acceleration", 0, [])
+
+        # Now set up the actual springs and masses
+        self.scaling = 0.1
+        massRelWidth = 0.3
+        massRelHeight = 0.1
+        self.springX = 2.0
+        self.spring = Spring(self.naturalLengthP, self.stiffnessP, 20, self.originalDisplacementP, self.springX, 0.5, self.scaling, self.tensionP, self.elasticEnergyP, 0.05)
+        self.springMass = Mass(Vector(self.springX, 1 + self.naturalLengthP.value), Vector(0, 0), self.numberOfMassesP, self.kineticEnergyP, self.displacementP, self.velocityP, self.accelerationP,
+                               self.scaling, massRelWidth, massRelHeight, black, red)
+
+        parameterArray = [self.numberOfMassesP, self.stiffnessP, self.naturalLengthP, self.originalDisplacementP]
+        objectArray = [self.spring, self.springMass]
+        outputParameterArray = [self.tensionP, self.elasticEnergyP, self.kineticEnergyP, self.displacementP, self.velocityP, self.accelerationP]
+        SimulationModel.__init__(self, parameterArray, objectArray, outputParameterArray)
+        # Long ticks, split up by the adaptive integrator wherever the motion needs it (eg for stiff springs).
+        self.timeStep = 0.05
+        self.setIntegrator(AdaptiveRungeKutta45(1e-7))
+
+        # The motion is worked out exactly when analytic is True, and only integrated if it is False.
+        self.analytic = True
+        self.solution = None
+        self.solutionInputs = None
+        self.updateStopped()
+        self.initialSnapshot = self.snapshot()
+
+    def updatePlaying(self, deltaTime):
+        if self.analytic:
+            self.followSolution(self.time - deltaTime)
+        else:
+            self.springMass.update(self.springForce, deltaTime)
+            self.spring.update(self.springMass.position.y)
+        return True
+
+    def followSolution(self, startTime):
+        '''
+        Moves the masses to where the exact solution says they are at the current time.
+        A new solution is started from where the masses were at startTime if there isn't one yet or a parameter has changed.
+        '''
+        self.springMass.updateFromInput()
+        inputs = (self.stiffnessP.value, self.springMass.mass, self.naturalLengthP.value)
+        if self.solution is None or inputs != self.solutionInputs:
+            naturalEnd = self.spring.topY + 3 * self.spring.radius + self.naturalLengthP.value # Where the masses would be with no tension
+            self.solution = SpringSolution(startTime, self.springMass.position.y, self.springMass.velocity.y, self.stiffnessP.value, self.springMass.mass, naturalEnd)
+            self.solutionInputs = inputs
+
+        position, velocity, acceleration = self.solution.stateAt(self.time)
+        self.springMass.setMotion(Vector(self.springX, position), Vector(0, velocity), Vector(0, acceleration))
+        self.spring.update(position)
+
+    def seek(self, time):
+        '''
+        Jumps straight to any time in the current run, without stepping through the time in between.
+        '''
+        self.followSolution(self.time)
+        self.time = time
+        self.followSolution(time)
+        self.forgetTicks()
+
+    def updateStopped(self):
+        self.solution = None # Start a new solution when played again, as the masses may have been moved.
+        self.spring.update()
+        self.springMass.update(bottom = Vector(self.springX, 0.5 + self.naturalLengthP.value + self.originalDisplacementP.value + 3 * self.spring.radius))
+
+    def springForce(self, position, velocity):
+        '''
+        Finds the force on the masses (weight minus tension) if they were at the given position.
+        '''
+        return Vector(0.0, -self.spring.tensionAt(position.y) + g * self.springMass.mass)
+
+class SpringSolution(object):
+    '''
+    The exact solution for masses bouncing on a spring. Measuring from the equilibrium position, the displacement is
+    A cos(w t) + B / w sin(w t), where w = sqrt(k / m), A is the starting displacement and B the starting velocity.
+    '''
+
+    def __init__(self, startTime, position, velocity, stiffness, mass, naturalEnd):
+        '''
+        Sets up the solution for masses at the given position and velocity at startTime.
+        naturalEnd is the position of the masses when the spring is at its natural length.
+        '''
+        self.startTime = startTime
+        self.omega = sqrt(stiffness / float(mass))
+        self.equilibrium = naturalEnd + g / self.omega ** 2 # Where the tension balances the weight
+        self.startDisplacement = position - self.equilibrium
+        self.startVelocity = velocity
+
+    def stateAt(self, time):
+        '''
+        Returns the position, velocity and acceleration of the masses at any time.
+        '''
+        angle = self.omega * (time - self.startTime)
+        c = cos(angle)
+        s = sin(angle)
+        displacement = self.startDisplacement * c + self.startVelocity / self.omega * s
+        velocity = self.startVelocity * c - self.startDisplacement * self.omega * s
+        return self.equilibrium + displacement, velocity, - self.omega ** 2 * displacement
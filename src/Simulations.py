@@ -5,18 +5,23 @@ from PhysicalObjects import *
 from Extra import *
 from Graphs import Graph
 from ForceDiagrams import ForceDiagram
+from SimulationModels import *
+from PhysicsThreads import PhysicsThread, showFrame
+import threading
 
 g = 9.8
 
 class SimulationScreen(object):
     '''
     Implements a base class for all simulations to inherit from.
+    The physics lives in a SimulationModel, and the screen just draws it and passes on the user's input.
     '''
 
-    def __init__(self, sliderArray, inputBoxArray, objectArray, parameterArray, rightPanelArray):
+    def __init__(self, model, sliderArray, inputBoxArray, objectArray, rightPanelArray):
         '''
-        Sets up a general based on the objects it contains.
+        Sets up a general based on the model it shows and the objects it contains.
         '''
+        self.model = model
         self.sliderArray = sliderArray
         self.inputBoxArray = inputBoxArray
         self.objectArray = objectArray
@@ -31,19 +36,42 @@ class SimulationScreen(object):
             self.rightPanelTabs = None
 
         self.playing = False
-        self.parameterArray = parameterArray
+        self.parameterArray = model.parameterArray
         self.lastTime = millis()
         self.startButton = StartStopButton(0.9, 0.36, 0.08, 0.05)
         self.resetButton = ResetButton(0.9, 0.42, 0.08, 0.05)
         self.paused = False
 
-        self.timeModeButtons = VerticalRadioButtons(["Real Time", "Controlled Time", "Slow Time"], 0.78, 0.38, 0.01)
+        self.timeModeButtons = VerticalRadioButtons(["Real Time", "Controlled Time", "Slow Time", "Fast Forward"], 0.78, 0.38, 0.01)
         self.timeMode = "REALTIME"
 
+        # When fast forwarding, the physics gets this many seconds of each frame, and the speed reached is shown.
+        self.fastForwardBudget = 0.025
+        self.fastForwardRate = 0.0 # Simulated seconds per real second
+
+        # The physics can run on its own thread (see startPhysicsThread). Anything that changes the model from the screen
+        # has to hold modelLock, in case it is. Parameters take it themselves when they change (see startPhysicsThread).
+        self.modelLock = threading.RLock()
+        self.physicsThread = None
+
     def updateSimulation(self):
         '''
         Updates all the objects in the simulation.
         '''
+        self.updateTime()
+        if self.physicsThread is not None:
+            self.updateFromPhysicsThread()
+            return
+
+        # Move the model on by however many ticks fit in this frame, or keep it in line with the parameters when stopped.
+        if self.playing and not self.paused:
+            if self.timeMode == "FASTFORWARD":
+                self.fastForward()
+            elif not self.model.advance(self.deltaTime):
+                self.breakDown()
+        elif not self.paused:
+            self.model.updateStoppedIfChanged()
+        self.model.updateDrawing(self.playing and not self.paused and self.timeMode != "FASTFORWARD")
 
         # Update the graph currently being displayed
         if self.playing and not self.paused:
@@ -53,6 +81,78 @@ class SimulationScreen(object):
         # Finally, update the sliders.
         self.updateSliders()
 
+    def startPhysicsThread(self):
+        '''
+        Moves the stepping of the model onto its own thread. Call close when leaving the simulation to stop it.
+        '''
+        if self.physicsThread is None:
+            # The sliders and input boxes set parameters from this thread, so they need the lock, but only when they
+            # actually change something, so frames don't wait for the physics just to check the inputs.
+            for parameter in self.model.parameterArray:
+                parameter.lock = self.modelLock
+            self.physicsThread = PhysicsThread(self.model, self.modelLock)
+            self.lastSimulatedTime = 0.0
+            self.physicsThread.start()
+
+    def close(self):
+        '''
+        Stops the physics thread, if there is one.
+        '''
+        if self.physicsThread is not None:
+            self.physicsThread.stop()
+            self.physicsThread = None
+            for parameter in self.model.parameterArray:
+                parameter.lock = None
+
+    def updateFromPhysicsThread(self):
+        '''
+        Does what updateSimulation does when the physics is on its own thread: passes on what the user wants, and draws the
+        latest frame the thread has published.
+        '''
+        physics = self.physicsThread
+        if physics.brokeDown:
+            # Stop the thread before clearing the flag, so it can't run another batch in between.
+            self.breakDown()
+            physics.playing = self.playing
+            physics.paused = self.paused
+            physics.brokeDown = False
+
+        simulatedTime = physics.simulatedTime - self.lastSimulatedTime
+        self.lastSimulatedTime += simulatedTime
+        if self.timeMode == "FASTFORWARD" and self.deltaTime > 0:
+            self.fastForwardRate += 0.2 * (simulatedTime / self.deltaTime - self.fastForwardRate)
+
+        physics.timeMode = self.timeMode
+        physics.fastForwardBudget = self.fastForwardBudget
+        if self.playing and not self.paused and self.timeMode in ("MEDIUMTIME", "SLOWTIME"):
+            physics.requestTime(self.deltaTime)
+        physics.playing = self.playing
+        physics.paused = self.paused
+
+        showFrame(self.model.objectArray, physics.latestFrame())
+
+        if self.playing and not self.paused:
+            if self.currentRightPanel:
+                self.currentRightPanel.update()
+        self.updateSliders()
+
+    def fastForward(self):
+        '''
+        Runs as many ticks as fit in fastForwardBudget, and keeps track of how fast the simulation is going compared to real time.
+        '''
+        simulatedTime, carryOn = self.model.fastForward(self.fastForwardBudget, lambda: millis() / 1000.0)
+        if self.deltaTime > 0:
+            # Smooth the rate out a bit, so the number shown doesn't jump about every frame.
+            self.fastForwardRate += 0.2 * (simulatedTime / self.deltaTime - self.fastForwardRate)
+        if not carryOn:
+            self.breakDown()
+
+    def breakDown(self):
+        '''
+        Called when the model breaks down, eg the coin leaves the roundabout. By default the simulation stops playing.
+        '''
+        self.playing = False
+
     def updateSliders(self):
         '''
         Updates sliders to check for input.
@@ -90,8 +190,11 @@ class SimulationScreen(object):
                 self.timeMode = "REALTIME"
             elif self.timeModeButtons.selected == "Controlled Time":
                 self.timeMode = "MEDIUMTIME"
-            else:
+            elif self.timeModeButtons.selected == "Slow Time":
                 self.timeMode = "SLOWTIME"
+            else:
+                self.timeMode = "FASTFORWARD"
+                self.fastForwardRate = 0.0
 
     def drawSimulation(self):
         '''
@@ -120,6 +223,10 @@ class SimulationScreen(object):
             inputBox.drawInput()
 
         self.timeModeButtons.drawInput()
+        if self.timeMode == "FASTFORWARD":
+            fill(255)
+            textSize(16)
+            relXText(str(round(self.fastForwardRate, 1)) + " s per s", 0.865, 0.48) # Next to Fast Forward, under the reset button
 
         # Draw the start and reset buttons
         self.startButton.display()
@@ -145,18 +252,14 @@ class SimulationScreen(object):
             p = param.split(" ")
             loadDict[p[0]] = p[1]
         for param in self.parameterArray:
-            param.value = float(loadDict[param.name])
+            param.setParameter(float(loadDict[param.name]))
 
     def resetSimulation(self):
         '''
         Resets the simulation back to its original state.
         '''
-
-        for parameter in self.parameterArray:
-            parameter.initialise()
-
-        for object in self.objectArray:
-            object.initialise()
+        with self.modelLock:
+            self.model.reset()
 
         self.playing = False
         self.startButton.playing = False
@@ -165,6 +268,49 @@ class SimulationScreen(object):
             self.currentRightPanel.display()
             self.rightPanelTabs.display()
 
+    def snapshotSimulation(self):
+        '''
+        Returns a copy of the whole state of the simulation: the model, whether it is playing, the state of any other objects
+        on the screen and where each graph has got to.
+        '''
+        with self.modelLock:
+            modelSnapshot = self.model.snapshot()
+        return {"model": modelSnapshot,
+                "playing": self.playing,
+                "paused": self.paused,
+                "objects": [object.getState() for object in self.screenObjects()],
+                "rightPanels": [panel.getState() if hasattr(panel, "getState") and hasattr(panel, "x") else None for panel in self.rightPanelArray]}
+
+    def restoreSimulation(self, snapshot):
+        '''
+        Puts the simulation back exactly as it was when the snapshot was taken.
+        '''
+        with self.modelLock:
+            self.model.restore(snapshot["model"])
+        self.playing = snapshot["playing"]
+        self.startButton.playing = self.playing
+        self.paused = snapshot["paused"]
+        for object, state in zip(self.screenObjects(), snapshot["objects"]):
+            object.setState(state)
+        for panel, state in zip(self.rightPanelArray, snapshot["rightPanels"]):
+            if state is not None:
+                panel.setState(state)
+
+    def screenObjects(self):
+        # The objects drawn that the model doesn't look after itself, eg break down messages.
+        return [object for object in self.objectArray if not object in self.model.objectArray]
+
+    def rewindSimulation(self, seconds):
+        '''
+        Takes the simulation back by (at least) seconds, and starts the graph again from there.
+        '''
+        with self.modelLock:
+            self.model.rewind(seconds)
+        self.paused = False
+        if self.currentRightPanel:
+            self.currentRightPanel.display()
+            self.rightPanelTabs.display()
+
     def pressKeys(self):
         '''
         Checks whether any of the input boxes need the key the user has pressed, and uses it there
@@ -173,8 +319,12 @@ class SimulationScreen(object):
             inputBox.updateKeyboard()
 
     def updateTime(self):
+        '''
+        Works out how much simulated time this frame should cover. The model splits it into fixed ticks itself.
+        When fast forwarding it is the real length of the last frame, for working out how fast it is going.
+        '''
         #print self.timeMode
-        if self.timeMode == "REALTIME":
+        if self.timeMode == "REALTIME" or self.timeMode == "FASTFORWARD":
             self.deltaTime = (millis() - self.lastTime) / 1000.0
         elif self.timeMode == "MEDIUMTIME":
             self.deltaTime = 0.03
@@ -192,58 +342,41 @@ class CoinOnRoundabout(SimulationScreen):
         '''
         Sets up the simulation, requiring no inputs.
         '''
-        self.omegaP = Parameter("omega", 1.0, [])
+        model = CoinOnRoundaboutModel()
+
+        self.omegaP = model.omegaP
         omegaSlider = Slider(0.01, 0.37, 0.0, 10.0, "Omega", "rad/s", self.omegaP)
         omegaInputBox = InputBox(0.16, 0.36, 0.0, 10.0, self.omegaP)
         self.omegaP.inputs = [omegaSlider, omegaInputBox]
 
-        self.massP = Parameter("mass", 5.0, [])
+        self.massP = model.massP
         massSlider = Slider(0.01, 0.43, 1.0, 10.0, "Mass", "kg", self.massP)
         massInputBox = InputBox(0.16, 0.42, 1.0, 10.0, self.massP)
         self.massP.inputs = [massSlider, massInputBox]
 
-        self.muP = Parameter("mu", 0.5, [])
+        self.muP = model.muP
         muSlider = Slider(0.38, 0.37, 0.0, 2.0, "Coefficient of friction", "", self.muP)
         muInputBox = InputBox(0.53, 0.36, 0.0, 2.0, self.muP)
         self.muP.inputs = [muSlider, muInputBox]
 
-        self.radiusP = Parameter("radius", 0.5, [])
+        self.radiusP = model.radiusP
         radiusSlider = Slider(0.38, 0.43, 0.01, 1.0, "Radius", "m", self.radiusP) # Minimum is 0.01 to avoid dividing by 0.
         radiusInputBox = InputBox(0.53, 0.42, 0.01, 1.0, self.radiusP)
         self.radiusP.inputs = [radiusSlider, radiusInputBox]
 
         sliderArray = [massSlider, omegaSlider, muSlider, radiusSlider]
         inputBoxArray = [massInputBox, omegaInputBox, muInputBox, radiusInputBox]
-        parameterArray = [self.massP, self.omegaP, self.muP, self.radiusP]
-
-        self.scaling = 0.15
-        centre = Vector(1.4, 1.0)
-
-        positionYP = Parameter("Y position", 0, [])
-        positionXP = Parameter("X position", 0, [])
 
-        self.coin = Coin(1, Vector(0, 0), Vector(0, -2), self.scaling, 0.2, 0.2, yellow, self.massP, self.radiusP, self.muP, self.omegaP, positionXP, positionYP, centre)
-        self.roundabout = Roundabout(self.omegaP, centre, 2.0, self.scaling)
+        self.coin = model.coin
+        self.roundabout = model.roundabout
 
         coinForceDiagram = ForceDiagram("Force Diagram", "assets/CoinDiagram.png")
-        projectedPositionGraph = Graph("Projected to 1D", [positionXP, positionYP], [color(0, 255, 0), color(0, 0, 255)], -1.0, 1.0)
+        projectedPositionGraph = Graph("Projected to 1D", [model.positionXP, model.positionYP], [color(0, 255, 0), color(0, 0, 255)], -1.0, 1.0)
 
         rightPanelArray = [coinForceDiagram, projectedPositionGraph]
         objectArray = [self.roundabout, self.coin]
 
-        SimulationScreen.__init__(self, sliderArray, inputBoxArray, objectArray, parameterArray, rightPanelArray)
-
-    def updateSimulation(self):
-        self.updateTime()
-
-        if self.playing:
-            self.coin.update(self.coin.findForce(), self.deltaTime)
-            self.roundabout.update(self.deltaTime)
-            if abs(self.coin.centre - self.coin.position) > 1.2:
-                self.playing = False
-        else:
-            self.coin.updateFromInput()
-        SimulationScreen.updateSimulation(self)
+        SimulationScreen.__init__(self, model, sliderArray, inputBoxArray, objectArray, rightPanelArray)
 
 class CarOnRacetrack(SimulationScreen):
     '''
@@ -254,70 +387,54 @@ class CarOnRacetrack(SimulationScreen):
         '''
         Sets up the simulation, requiring no inputs.
         '''
-        self.playing = False
+        model = CarOnRacetrackModel()
 
-        self.angleP = Parameter("angle", 30.0, [])
+        self.angleP = model.angleP
         angleSlider = Slider(0.01, 0.39, 0.0, 85.0, "Angle", "degrees", self.angleP)
         angleInputBox = InputBox(0.16, 0.38, 0.0, 85.0, self.angleP)
         self.angleP.inputs = [angleSlider, angleInputBox]
 
-        self.massP = Parameter("mass", 1000.0, [])
+        self.massP = model.massP
         massSlider = Slider(0.01, 0.45, 0.0, 5000.0, "Mass", "kg", self.massP)
         massInputBox = InputBox(0.16, 0.44, 0.0, 5000.0, self.massP)
         self.massP.inputs = [massSlider, massInputBox]
 
-        self.radiusP = Parameter("radius", 10.0, [])
+        self.radiusP = model.radiusP
         radiusSlider = Slider(0.38, 0.37, 2.0, 20.0, "Radius", "m", self.radiusP)
         radiusInputBox = InputBox(0.53, 0.36, 2.0, 20.0, self.radiusP)
         self.radiusP.inputs = [radiusSlider, radiusInputBox]
 
-        self.muP = Parameter("mu", 0.5, [])
+        self.muP = model.muP
         muSlider = Slider(0.38, 0.42, 0.0, 2.0, "Coefficient of Friction", "", self.muP)
         muInputBox = InputBox(0.53, 0.41, 0.0, 2.0, self.muP)
         self.muP.inputs = [muSlider, muInputBox]
 
-        self.speedP = Parameter("speed", 10.0, [])
+        self.speedP = model.speedP
         speedSlider = Slider(0.38, 0.465, 0.0, 40.0, "Speed", "m/s", self.speedP)
         speedInputBox = InputBox(0.53, 0.455,0.0, 40.0, self.speedP)
         self.speedP.inputs = [speedSlider, speedInputBox]
 
-        self.scaling = 0.006
-        self.centre = Vector(25.0, 25.0)
-        self.racetrack = Racetrack(self.radiusP, 4, self.centre, self.scaling)
-        self.car = Car(self.centre, self.speedP, self.radiusP, self.massP, self.angleP, self.muP, 3.0, 2.0, color(50, 100, 255), self.scaling) # Blue car
+        self.racetrack = model.racetrack
+        self.car = model.car
         self.breakDownMessage = BreakDownMessage("", 0.1, 0.25, 0.3, 0.1, 30)
 
         flyingOffUnresolved = ForceDiagram("Flying Off", "assets/CarDiagramUpSlope.png")
         flyingOffResolved = ForceDiagram("Resolved", "assets/CarDiagramResolvedUpSlope.png")
         fallingInUnresolved = ForceDiagram("Falling In", "assets/CarDiagramDownSlope.png")
         fallingInResolved = ForceDiagram("Resolved", "assets/CarDiagramResolvedDownSlope.png")
+        safeSpeedGraph = Graph("Safe Speeds", [model.minimumSpeedP, self.speedP, model.maximumSpeedP], [color(0, 0, 255), color(0), color(0, 255, 0)], 0, 40)
 
 
         sliderArray = [massSlider, angleSlider, muSlider, radiusSlider, speedSlider]
         inputBoxArray = [massInputBox, angleInputBox, muInputBox, radiusInputBox, speedInputBox]
-        parameterArray = [self.angleP, self.massP, self.radiusP, self.muP, self.speedP]
         objectArray = [self.racetrack, self.car, self.breakDownMessage]
-        rightPanelArray = [flyingOffUnresolved, flyingOffResolved, fallingInUnresolved, fallingInResolved]
+        rightPanelArray = [flyingOffUnresolved, flyingOffResolved, fallingInUnresolved, fallingInResolved, safeSpeedGraph]
 
-        SimulationScreen.__init__(self, sliderArray, inputBoxArray, objectArray, parameterArray, rightPanelArray)
+        SimulationScreen.__init__(self, model, sliderArray, inputBoxArray, objectArray, rightPanelArray)
 
     def updateSimulation(self):
-        self.updateTime()
-        self.racetrack.updateFromInput()
-
-        if self.playing:
-            self.car.update(self.deltaTime)
-            if self.car.slipping > 0:
-                self.breakDownMessage.displayText = "The car flew off."
-            elif self.car.slipping < 0:
-                self.breakDownMessage.displayText = "The car fell in."
-            if abs(self.car.slipped) > 2.0:
-                # Stop the simulation when the car has slipped too much.
-                self.playing = False
-        else:
-            self.car.updateFromInput()
-
         SimulationScreen.updateSimulation(self)
+        self.breakDownMessage.displayText = self.model.breakDownText
 
 
 class VerticalRotation(SimulationScreen):
@@ -329,22 +446,24 @@ class VerticalRotation(SimulationScreen):
         '''
         Sets up the simulation, requiring no inputs.
         '''
-        self.radiusP = Parameter("radius", 1.5, [])
+        model = VerticalRotationModel()
+
+        self.radiusP = model.radiusP
         radiusSlider = Slider(0.01, 0.37, 0.5, 2.0, "Radius", "m", self.radiusP)
         radiusInputBox = InputBox(0.16, 0.36, 0.5, 2.0, self.radiusP)
         self.radiusP.inputs = [radiusSlider, radiusInputBox]
 
-        self.massP = Parameter("mass", 5.0, [])
+        self.massP = model.massP
         massSlider = Slider(0.01, 0.43, 1.0, 10.0, "Mass", "kg", self.massP)
         massInputBox = InputBox(0.16, 0.42, 1.0, 10.0, self.massP)
         self.massP.inputs = [massSlider, massInputBox]
 
-        self.initialAngleP = Parameter("angle", 45.0, [])
+        self.initialAngleP = model.initialAngleP
         initialAngleSlider = Slider(0.38, 0.37, 0, 360, "Initial angle", "degrees", self.initialAngleP)
         initialAngleInputBox = InputBox(0.53, 0.36, 0, 360, self.initialAngleP)
         self.initialAngleP.inputs = [initialAngleSlider, initialAngleInputBox]
 
-        self.initialSpeedP = Parameter("speed", 0.0, [])
+        self.initialSpeedP = model.initialSpeedP
         initialSpeedSlider = Slider(0.38, 0.43, 0.0, 10.0, "Initial speed", "m/s", self.initialSpeedP)
         initialSpeedInputBox = InputBox(0.53, 0.42, 0.0, 10.0, self.initialSpeedP)
         self.initialSpeedP.inputs = [initialSpeedSlider, initialSpeedInputBox]
@@ -352,68 +471,47 @@ class VerticalRotation(SimulationScreen):
         # Set up radio buttons
         self.modeButtons = HorizontalRadioButtons(["String", "Wire", "Outside Sphere", "Inside Sphere"], 0.05, 0.32, 0.01)
 
-        gravitationalEnergyP = Parameter("Gravitational Potential Energy", 0, [])
-        kineticEnergyP = Parameter("Kinetic Energy", 0, [])
-
         generalForceDiagram = ForceDiagram("Force Diagram", "assets/VerticalCirclesForces.png")
-        energyGraph = Graph("Energy", [gravitationalEnergyP, kineticEnergyP], [color(255, 255, 0), color(155, 0, 255)], -400, 400)
+        energyGraph = Graph("Energy", [model.gravitationalEnergyP, model.kineticEnergyP], [color(255, 255, 0), color(155, 0, 255)], -400, 400)
 
         sliderArray = [massSlider, initialAngleSlider, initialSpeedSlider, radiusSlider]
         inputBoxArray = [massInputBox, initialAngleInputBox, initialSpeedInputBox, radiusInputBox, self.modeButtons]
-        parameterArray = [self.radiusP, self.massP, self.initialAngleP, self.initialSpeedP]
 
-        self.scaling = 0.06
-        self.centre = Vector(2.6, 2.4)
-        self.mass = CircularMass(0.1, Vector(0, 0), Vector(0, 0), self.scaling, color(0, 0, 0), self.massP, self.radiusP, self.initialAngleP, self.initialSpeedP,
-                                 kineticEnergyP, gravitationalEnergyP, self.centre)
+        self.mass = model.mass
         self.breakDownMessage = BreakDownMessage("", 0.1, 0.23, 0.3, 0.1, 30)
 
-        objectArray = [None, self.mass, self.breakDownMessage] # None place holds for the circle thing
+        objectArray = [model.circleThing, self.mass, self.breakDownMessage]
         rightPanelArray = [generalForceDiagram, energyGraph]
-        SimulationScreen.__init__(self, sliderArray, inputBoxArray, objectArray, parameterArray, rightPanelArray)
+        SimulationScreen.__init__(self, model, sliderArray, inputBoxArray, objectArray, rightPanelArray)
 
         self.mode = "String"
         self.setUpCircle()
         self.paused = False
 
     def updateSimulation(self):
-        self.updateTime()
-
         if self.mode != self.modeButtons.selected:
             self.mode = self.modeButtons.selected
             self.setUpCircle()
 
-        if self.playing and not self.paused:
-            forceRequired = self.mass.forceInwardsRequired()
-            if self.circleThing.checkForceInwards(forceRequired):
-                self.mass.update(Vector(0, self.mass.mass * g) + (self.centre - self.mass.position).scaleAbs(forceRequired), self.deltaTime)
-            else:
-                self.paused = True
-                # Choose appropriate error message.
-                if self.mode == "String":
-                    self.breakDownMessage.displayText = "The string became slack."
-                elif self.mode == "Outside Sphere":
-                    self.breakDownMessage.displayText = "The mass fell off the sphere."
-                elif self.mode == "Inside Sphere":
-                    self.breakDownMessage.displayText = "The mass fell inside the sphere."
-
-            self.circleThing.updateFromInput()
-        elif not self.paused:
-            self.breakDownMessage.displayText = ""
-            self.mass.updateWhenPaused()
-            self.circleThing.updateFromInput()
-
         SimulationScreen.updateSimulation(self)
+        self.breakDownMessage.displayText = self.model.breakDownText
+
+    def breakDown(self):
+        # The mass is left where it broke down until the simulation is reset.
+        self.paused = True
+
+    def restoreSimulation(self, snapshot):
+        SimulationScreen.restoreSimulation(self, snapshot)
+        # The model may have changed what the mass is attached to, so show the same here.
+        self.mode = self.model.mode
+        self.modeButtons.select([button for button in self.modeButtons.buttons if button.name == self.mode][0])
+        self.circleThing = self.model.circleThing
+        self.objectArray[0] = self.circleThing
 
     def setUpCircle(self):
-        if self.mode == "String":
-            self.circleThing = Rope(self.mass, self.centre, self.scaling)
-        elif self.mode == "Wire":
-            self.circleThing = Wire(self.mass, self.centre, self.scaling)
-        elif self.mode == "Outside Sphere":
-            self.circleThing = OutsideSphere(self.radiusP, self.centre, self.scaling, color(154, 10, 207), color(218, 124, 252, 20))
-        elif self.mode == "Inside Sphere":
-            self.circleThing = InsideSphere(self.radiusP, self.centre, self.scaling, color(154, 10, 207), color(218, 124, 252, 20))
+        with self.modelLock:
+            self.model.setMode(self.mode)
+        self.circleThing = self.model.circleThing
         self.objectArray[0] = self.circleThing # Swap it into the object list.
 
 class SimpleHarmonicSprings(SimulationScreen):
@@ -425,23 +523,25 @@ class SimpleHarmonicSprings(SimulationScreen):
         '''
         Sets up the simulation, requiring no inputs.
         '''
-        # First, set up all input parameters and input sliders / boxes
-        self.numberOfMassesP = Parameter("masses", 1, [])
+        model = SimpleHarmonicSpringsModel()
+
+        # First, set up all input sliders / boxes for the parameters
+        self.numberOfMassesP = model.numberOfMassesP
         massSlider = IntSlider(0.01, 0.37, 1.0, 5.0, "Number Of Masses", "", self.numberOfMassesP)
         massInputBox = IntInputBox(0.16, 0.36, 1.0, 5.0, self.numberOfMassesP)
         self.numberOfMassesP.inputs = [massSlider, massInputBox]
 
-        self.stiffnessP = Parameter("stiffness", 50.0, [])
+        self.stiffnessP = model.stiffnessP
         stiffnessSlider = Slider(0.01, 0.43, 1.0, 100.0, "Stiffness Constant", "N/m", self.stiffnessP)
         stiffnessInputBox = InputBox(0.16, 0.42, 1.0, 100.0, self.stiffnessP)
         self.stiffnessP.inputs = [stiffnessSlider, stiffnessInputBox]
 
-        self.naturalLengthP = Parameter("naturallength", 1.0, [])
+        self.naturalLengthP = model.naturalLengthP
         naturalLengthSlider = Slider(0.38, 0.37, 0.5, 3.0, "Natural Length", "m", self.naturalLengthP)
         naturalLengthInputBox = InputBox(0.53, 0.36, 0.5, 3.0, self.naturalLengthP)
         self.naturalLengthP.inputs = [naturalLengthSlider, naturalLengthInputBox]
 
-        self.originalDisplacementP = Parameter("displacment", 0.0, [])
+        self.originalDisplacementP = model.originalDisplacementP
         originalDisplacementSlider = Slider(0.38, 0.43, -1.0, 1.0, "Original Displacement", "m", self.originalDisplacementP)
         originalDisplacementInputBox = InputBox(0.53, 0.42, -1.0, 1.0, self.originalDisplacementP)
         self.originalDisplacementP.inputs = [originalDisplacementSlider, originalDisplacementInputBox]
@@ -449,38 +549,13 @@ class SimpleHarmonicSprings(SimulationScreen):
         sliderArray = [massSlider, stiffnessSlider, naturalLengthSlider, originalDisplacementSlider]
         inputBoxArray = [massInputBox, stiffnessInputBox, naturalLengthInputBox, originalDisplacementInputBox]
 
-        # Now set up output parameters
-        self.tensionP = Parameter("Tension", 0, [])
-        elasticEnergyP = Parameter("Elastic Energy", 0, [])
-        kineticEnergyP = Parameter("Kinetic Energy", 0, [])
-        displacementP = Parameter("Displacement", 0, [])
-        velocityP = Parameter("Velocity", 0, [])
-        accelerationP = Parameter("Acceleration", 0, [])
-
-        # Now set up the actual springs and masses
-        scaling = 0.1
-        massRelWidth = 0.3
-        massRelHeight = 0.1
-        self.springX = 2.0
-        self.spring = Spring(self.naturalLengthP, self.stiffnessP, 20, self.originalDisplacementP, self.springX, 0.5, scaling, self.tensionP, elasticEnergyP, 0.05)
-        self.springMass = Mass(Vector(self.springX, 1 + self.naturalLengthP.value), Vector(0, 0), self.numberOfMassesP, kineticEnergyP, displacementP, velocityP, accelerationP, scaling, massRelWidth, massRelHeight, black, red)
-
-        energyGraph = Graph("Energy", [elasticEnergyP, kineticEnergyP], [color(0), color(0, 255, 0)], 0, 30)
-        motionGraph = Graph("Motion", [displacementP, velocityP, accelerationP], [color(0), color(0, 255, 0), color(0, 0, 255)], -20, 20)
+        self.tensionP = model.tensionP
+        self.spring = model.spring
+        self.springMass = model.springMass
+
+        energyGraph = Graph("Energy", [model.elasticEnergyP, model.kineticEnergyP], [color(0), color(0, 255, 0)], 0, 30)
+        motionGraph = Graph("Motion", [model.displacementP, model.velocityP, model.accelerationP], [color(0), color(0, 255, 0), color(0, 0, 255)], -20, 20)
 
         rightPanelArray = [energyGraph, motionGraph]
-        parameterArray = [self.numberOfMassesP, self.stiffnessP, self.naturalLengthP, self.originalDisplacementP]
         objectArray = [self.spring, self.springMass]
-        SimulationScreen.__init__(self, sliderArray, inputBoxArray, objectArray, parameterArray, rightPanelArray)
-
-    def updateSimulation(self):
-        self.updateTime()
-
-        if self.playing:
-            self.springMass.update(Vector(0.0,  -self.tensionP.value + g * self.springMass.mass), self.deltaTime)
-            self.spring.update(self.springMass.position.y)
-        else:
-            self.spring.update()
-            self.springMass.update(bottom = Vector(self.springX, 0.5 + self.naturalLengthP.value + self.originalDisplacementP.value + 3 * self.spring.radius))
-
-        SimulationScreen.updateSimulation(self)
+        SimulationScreen.__init__(self, model, sliderArray, inputBoxArray, objectArray, rightPanelArray)
@@ -0,0 +1,135 @@
+# TODO:
+
+# Runs a simulation headless for lots of different parameter values at once, spread across all the processor's cores.
+# Nothing here draws anything, so it can be run from a plain Python script (it sets up the Processing stand ins itself).
+
+import os
+import sys
+from itertools import product
+
+try:
+    import ProcessingShim # Does nothing inside Processing
+except ImportError:
+    # Imported as src.Sweeps, so src isn't on the path yet. ProcessingShim adds it, so SimulationModels can be found too.
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import ProcessingShim
+import SimulationModels
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None # Jython (and so Processing) doesn't have it, so sweeps run one at a time there.
+
+def grid(**values):
+    '''
+    Makes a list of parameter sets, one for every combination of the values given, eg grid(omegaP = [1, 2], muP = [0.1, 0.5]).
+    The keys are sorted so the order is always the same, with the last key changing fastest.
+    '''
+    keys = sorted(values)
+    return [dict(zip(keys, combination)) for combination in product(*[values[key] for key in keys])]
+
+def setUpModel(modelName, parameterSet):
+    '''
+    Makes a new model and applies a parameter set to it.
+    Keys can be the name of a parameter attribute (eg "omegaP"), which is set to the value, or of a method (eg "setMode"),
+    which is called with the value. Methods are called first, as they might change which objects are used.
+    '''
+    model = getattr(SimulationModels, modelName)()
+    methods = [key for key in sorted(parameterSet) if not getattr(model, key, None) in model.parameterArray]
+    parameters = [key for key in sorted(parameterSet) if not key in methods]
+
+    for key in methods:
+        if not callable(getattr(model, key, None)):
+            raise ValueError(key + " is not a parameter or method of " + modelName + ".")
+        getattr(model, key)(parameterSet[key])
+    for key in parameters:
+        getattr(model, key).setParameter(parameterSet[key])
+    model.updateStopped()
+    return model
+
+def runParameterSet(task):
+    '''
+    Runs one model with one parameter set, and returns a dictionary of what happened.
+    This is what each process in the pool runs, so it only takes and returns things that can be pickled.
+    '''
+    modelName, parameterSet, duration, deltaTime = task
+    model = setUpModel(modelName, parameterSet)
+    if deltaTime is None:
+        deltaTime = model.timeStep
+
+    # Keep track of every output parameter each tick for the summary statistics.
+    names = [parameter.name for parameter in model.outputParameterArray]
+    minimums = [None for parameter in model.outputParameterArray]
+    maximums = [None for parameter in model.outputParameterArray]
+    totals = [0.0 for parameter in model.outputParameterArray]
+
+    steps = 0
+    brokeDown = False
+    for tick in range(int(round(duration / deltaTime))):
+        steps += 1
+        if not model.step(deltaTime):
+            brokeDown = True
+        for index, parameter in enumerate(model.outputParameterArray):
+            if steps == 1 or parameter.value < minimums[index]:
+                minimums[index] = parameter.value
+            if steps == 1 or parameter.value > maximums[index]:
+                maximums[index] = parameter.value
+            totals[index] += parameter.value
+        if brokeDown:
+            break
+
+    return {"parameters": parameterSet,
+            "time": model.time,
+            "ticks": steps,
+            "brokeDown": brokeDown,
+            "breakDownText": model.breakDownText,
+            "events": [(event.name, event.time, event.value) for event in model.events],
+            "final": dict((parameter.name, parameter.value) for parameter in model.outputParameterArray),
+            "finalStates": model.renderStates(),
+            "minimum": dict(zip(names, minimums)),
+            "maximum": dict(zip(names, maximums)),
+            "mean": dict((name, total / max(steps, 1)) for name, total in zip(names, totals))}
+
+def sweep(modelClass, parameterSets, duration, deltaTime = None, processes = None):
+    '''
+    Runs the model (eg SimulationModels.CoinOnRoundaboutModel) for duration seconds once for each parameter set, stopping
+    each run early if it breaks down. The ticks are deltaTime long, or the model's own timeStep if it isn't given.
+    The runs are shared out between a pool of processes (one per core unless processes is given), or run one after another
+    if processes is 1 or multiprocessing isn't available.
+    Returns a list with a dictionary of results for each parameter set, in the same order as the parameter sets.
+    '''
+    tasks = [(modelClass.__name__, parameterSet, duration, deltaTime) for parameterSet in parameterSets]
+
+    if multiprocessing is None or processes == 1 or len(tasks) < 2:
+        return [runParameterSet(task) for task in tasks]
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        # Send the tasks in chunks so each process isn't waiting on the others for every run, but still shares out the work evenly.
+        chunkSize = max(1, len(tasks) // (4 * (processes or multiprocessing.cpu_count())))
+        return pool.map(runParameterSet, tasks, chunkSize)
+    finally:
+        pool.close()
+        pool.join()
+
+def toTable(results):
+    '''
+    Flattens sweep results into a heading row and one row per run, eg for writing out with saveStrings.
+    Events are written as name@time.
+    '''
+    parameterNames = sorted(set(key for result in results for key in result["parameters"]))
+    outputNames = sorted(set(key for result in results for key in result["final"]))
+
+    headings = parameterNames + ["time", "ticks", "brokeDown", "events"]
+    for statistic in ["final", "minimum", "maximum", "mean"]:
+        headings += [statistic + " " + name for name in outputNames]
+
+    rows = []
+    for result in results:
+        row = [result["parameters"].get(name) for name in parameterNames]
+        row += [result["time"], result["ticks"], result["brokeDown"],
+                " ".join(name + "@" + str(round(time, 4)) for name, time, value in result["events"])]
+        for statistic in ["final", "minimum", "maximum", "mean"]:
+            row += [result[statistic].get(name) for name in outputNames]
+        rows.append(row)
+    return headings, rows
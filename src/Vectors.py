@@ -1,12 +1,24 @@
 # TODO:
 #    Implement drawAt
 
+from array import array
+from itertools import repeat
+
+try:
+    import numpy # Used by VectorBatch when it is installed (it isn't in Processing)
+except ImportError:
+    numpy = None
+
 class Vector(object):
     
     '''
     A simple class to represent vectors and allow basic vector operations.
+    The operators make new vectors, except augmented assignment (eg a += b) which changes the vector in place, as do
+    set, addScaled and scaleAbsInPlace. Only use those on vectors nothing else has a reference to.
     '''
 
+    __slots__ = ("x", "y") # Keeps vectors small and quick to make
+
     def __init__(self, x, y):
         # Set up the two components
         self.x = x
@@ -35,23 +47,35 @@ class Vector(object):
     def __div__(self, other):
         # Implements dividing vectors by floats
         return Vector(self.x / other, self.y / other)
+
+    __truediv__ = __div__ # Python 3 uses __truediv__ for /
     
     def __rmul__(self, other):
         # Multiplying is the same either way, eg Vector *  5 is 5 * Vector
         return self.__mul__(other)
     
-    # The following methods implement augmented assignment (eg a += 1)
+    # The following methods implement augmented assignment (eg a += b), changing the vector in place
     def __iadd__(self, other):
-        return self.__add__(other)
+        self.x += other.x
+        self.y += other.y
+        return self
     
     def __isub__(self, other):
-        return self.__sub__(other)
+        self.x -= other.x
+        self.y -= other.y
+        return self
     
     def __imul__(self, other):
-        return self.__mul__(other)
+        self.x *= other
+        self.y *= other
+        return self
     
     def __idiv__(self, other):
-        return self.__div__(other)
+        self.x /= other
+        self.y /= other
+        return self
+
+    __itruediv__ = __idiv__
     
     def __str__(self):
         # Displays vectors as (x, y) for testing
@@ -61,4 +85,150 @@ class Vector(object):
         if self.x == 0 and self.y == 0:
             return Vector(0, 0)
         else:
-            return self * number / abs(self)
\ No newline at end of file
+            return self * number / abs(self)
+
+    def copy(self):
+        return Vector(self.x, self.y)
+
+    # The following methods change the vector in place and return it, to avoid making new vectors in the simulations.
+    def set(self, x, y):
+        self.x = x
+        self.y = y
+        return self
+
+    def addScaled(self, other, number):
+        # Adds number * other, eg position.addScaled(velocity, time)
+        self.x += other.x * number
+        self.y += other.y * number
+        return self
+
+    def scaleAbsInPlace(self, number):
+        # Changes the length to number, keeping the direction
+        length = sqrt(self.x ** 2 + self.y ** 2)
+        if length != 0:
+            self.x *= number / length
+            self.y *= number / length
+        return self
+
+    def normaliseInPlace(self):
+        return self.scaleAbsInPlace(1.0)
+
+def componentsOf(other, length):
+    '''
+    Returns the x and y components of a VectorBatch, or of a single Vector repeated to match a batch of the given length.
+    '''
+    if isinstance(other, VectorBatch):
+        return other.x, other.y
+    return repeat(other.x, length), repeat(other.y, length)
+
+def numbersOf(number, length):
+    '''
+    Returns a sequence of numbers, one per vector, from either a single number or a sequence of them.
+    '''
+    if hasattr(number, "__len__"):
+        return number
+    return repeat(number, length)
+
+class VectorBatch(object):
+    '''
+    Holds lots of vectors at once, with all the x components in one array and all the y components in another.
+    The operations work on every vector together, so simulating many objects takes one call instead of one per object.
+    Uses numpy arrays when numpy is installed, and array('d') otherwise.
+    The other operand can be a VectorBatch of the same length or a single Vector, and numbers can be a single number
+    or a sequence with one number per vector.
+    '''
+
+    def __init__(self, xs, ys):
+        # Always copies the components, so batches never share arrays.
+        if numpy is not None:
+            self.x = numpy.array(xs, dtype = float)
+            self.y = numpy.array(ys, dtype = float)
+        else:
+            self.x = array('d', xs)
+            self.y = array('d', ys)
+
+    def fromVectors(cls, vectors):
+        # Makes a batch from a list of Vectors
+        return cls([vector.x for vector in vectors], [vector.y for vector in vectors])
+
+    fromVectors = classmethod(fromVectors)
+
+    def toVectors(self):
+        # Makes a list of separate Vectors
+        return [Vector(float(x), float(y)) for x, y in zip(self.x, self.y)]
+
+    def copy(self):
+        return VectorBatch(self.x, self.y)
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, index):
+        # Gives a single vector as a Vector
+        return Vector(float(self.x[index]), float(self.y[index]))
+
+    def __add__(self, other):
+        if numpy is not None:
+            return VectorBatch(self.x + other.x, self.y + other.y)
+        otherX, otherY = componentsOf(other, len(self))
+        return VectorBatch([a + b for a, b in zip(self.x, otherX)], [a + b for a, b in zip(self.y, otherY)])
+
+    def __sub__(self, other):
+        if numpy is not None:
+            return VectorBatch(self.x - other.x, self.y - other.y)
+        otherX, otherY = componentsOf(other, len(self))
+        return VectorBatch([a - b for a, b in zip(self.x, otherX)], [a - b for a, b in zip(self.y, otherY)])
+
+    def __mul__(self, number):
+        if numpy is not None:
+            number = numpy.asarray(number, dtype = float)
+            return VectorBatch(self.x * number, self.y * number)
+        numbers = list(numbersOf(number, len(self)))
+        return VectorBatch([a * n for a, n in zip(self.x, numbers)], [a * n for a, n in zip(self.y, numbers)])
+
+    def __rmul__(self, number):
+        return self.__mul__(number)
+
+    def __div__(self, number):
+        if numpy is not None:
+            number = numpy.asarray(number, dtype = float)
+            return VectorBatch(self.x / number, self.y / number)
+        numbers = list(numbersOf(number, len(self)))
+        return VectorBatch([a / n for a, n in zip(self.x, numbers)], [a / n for a, n in zip(self.y, numbers)])
+
+    __truediv__ = __div__
+
+    def perpendicular(self):
+        # Turns every vector a quarter turn, (x, y) to (-y, x)
+        if numpy is not None:
+            return VectorBatch(-self.y, self.x)
+        return VectorBatch([-y for y in self.y], self.x)
+
+    def __abs__(self):
+        # Returns an array of the lengths of the vectors
+        if numpy is not None:
+            return numpy.sqrt(self.x ** 2 + self.y ** 2)
+        return array('d', [sqrt(x ** 2 + y ** 2) for x, y in zip(self.x, self.y)])
+
+    def scaleAbs(self, number):
+        # Scales every vector to the given length, leaving zero vectors as zero like Vector.scaleAbs does
+        lengths = abs(self)
+        if numpy is not None:
+            factors = numpy.zeros(len(self))
+            numpy.divide(numpy.broadcast_to(numpy.asarray(number, dtype = float), lengths.shape), lengths, out = factors, where = lengths != 0)
+            return VectorBatch(self.x * factors, self.y * factors)
+        factors = [n / length if length != 0 else 0.0 for n, length in zip(numbersOf(number, len(self)), lengths)]
+        return VectorBatch([a * f for a, f in zip(self.x, factors)], [a * f for a, f in zip(self.y, factors)])
+
+    def addScaled(self, other, number):
+        # Adds number * other in place, eg positions.addScaled(velocities, time)
+        if numpy is not None:
+            number = numpy.asarray(number, dtype = float)
+            self.x += other.x * number
+            self.y += other.y * number
+        else:
+            otherX, otherY = componentsOf(other, len(self))
+            for index, (a, b, n) in enumerate(zip(otherX, otherY, numbersOf(number, len(self)))):
+                self.x[index] += a * n
+                self.y[index] += b * n
+        return self